@@ -0,0 +1,214 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cache_utils import ResultCache, extract_and_analyze
+from color_utils import CLUSTER_SPACES, QUANTIZERS, RGB_ONLY_QUANTIZERS
+from export_utils import EXPORT_SECTIONS, SwatchExporter
+from oil_paint_data import select_oil_paints
+from paint_catalogues import PRICE_CATEGORIES
+from pantone_data import available_pantone_libraries
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+
+# Export format -> file extension
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'json': '.json',
+    'ase': '.ase',
+    'css': '.css',
+    'scss': '.scss',
+    'figma': '.json',
+    'oil_paint_csv': '.csv',
+    'shopping_list_csv': '.csv'
+}
+
+def find_images(root: str, exclude: Optional[str] = None) -> Iterator[str]:
+    """Walk a directory tree and yield image files in a stable order"""
+    exclude = os.path.abspath(exclude) if exclude else None
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if exclude:
+            dirnames[:] = [d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) != exclude]
+        for filename in sorted(filenames):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+def palette_size(value: str):
+    """argparse type for --num-colors: a positive integer or 'auto'"""
+    if value == 'auto':
+        return value
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'auto', got {value!r}") from None
+    if count < 1:
+        raise argparse.ArgumentTypeError("number of colors must be at least 1")
+    return count
+
+def export_result(fmt: str, colors: List[Tuple[str, Tuple[int, int, int], str]],
+                  analyses: List[Dict], filename: str) -> bool:
+    """Write one image's palette through the matching SwatchExporter method"""
+    if fmt == 'csv':
+        return SwatchExporter.export_csv(colors, analyses, filename)
+    elif fmt == 'json':
+        return SwatchExporter.export_json(analyses, filename)
+    elif fmt == 'ase':
+        return SwatchExporter.export_adobe_ase(colors, filename)
+    elif fmt == 'css':
+        return SwatchExporter.export_css_variables(colors, filename)
+    elif fmt == 'scss':
+        return SwatchExporter.export_scss_variables(colors, filename)
+    elif fmt == 'figma':
+        return SwatchExporter.export_figma_tokens(colors, filename)
+    elif fmt == 'oil_paint_csv':
+        return SwatchExporter.export_oil_paint_palette(analyses, filename)
+    elif fmt == 'shopping_list_csv':
+        return SwatchExporter.export_shopping_list(colors, filename)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+def process_image_file(job: Tuple[str, str, str, Dict]) -> Tuple[str, bool, str]:
+    """Extract, analyze and export a single image (runs inside a worker process)"""
+    image_path, output_path, fmt, extract_options = job
+    try:
+        result = extract_and_analyze(image_path, cache=_worker_cache, sections=EXPORT_SECTIONS[fmt],
+                                     **extract_options)
+        analyses = result['analysis']
+        colors = list(zip(result['hex_colors'], result['rgb_colors'], result['pantone_names']))
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if not export_result(fmt, colors, analyses, output_path):
+            return image_path, False, "export failed"
+        return image_path, True, ""
+    except Exception as e:
+        return image_path, False, str(e)
+
+def _init_worker(use_cache: bool = True, paint_filters: Optional[Dict] = None):
+    global _worker_cache
+    _worker_cache = ResultCache() if use_cache else None
+    if paint_filters:
+        select_oil_paints(**paint_filters)
+
+    # One process per core already saturates the CPU - keep BLAS/OpenMP
+    # inside each worker single-threaded to avoid oversubscription
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+def run_batch(input_dir: str, output_dir: str, fmt: str = 'json', workers: Optional[int] = None,
+              quiet: bool = False, use_cache: bool = True, paint_filters: Optional[Dict] = None,
+              **extract_options) -> Dict:
+    """Extract palettes for every image below input_dir using a process pool.
+
+    paint_filters restricts oil paint matching (see select_oil_paints). Extra
+    keyword arguments are passed on to extract_dominant_colors.
+    """
+    extension = EXPORT_FORMATS[fmt]
+    jobs = []
+    for image_path in find_images(input_dir, exclude=output_dir):
+        relative = os.path.relpath(image_path, input_dir)
+        output_path = os.path.join(output_dir, os.path.splitext(relative)[0] + extension)
+        jobs.append((image_path, output_path, fmt, extract_options))
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, min(32, len(jobs) // (workers * 4)))
+    processed = failed = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(use_cache, paint_filters)) as executor:
+        for image_path, ok, error in executor.map(process_image_file, jobs, chunksize=chunksize):
+            if ok:
+                processed += 1
+            else:
+                failed += 1
+                print(f"Failed: {image_path}: {error}", file=sys.stderr)
+            if not quiet and (processed + failed) % 100 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{processed + failed}/{len(jobs)} images ({(processed + failed) / elapsed:.1f} images/sec)")
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'images': len(jobs),
+        'processed': processed,
+        'failed': failed,
+        'seconds': elapsed,
+        'images_per_sec': (processed + failed) / elapsed if elapsed > 0 else 0.0
+    }
+    if not quiet:
+        print(f"Processed {processed} images ({failed} failed) in {elapsed:.2f}s "
+              f"- {stats['images_per_sec']:.1f} images/sec")
+    return stats
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: python main.py batch <dir> [options]"""
+    parser = argparse.ArgumentParser(prog='farbdieb batch',
+                                     description='Extract palettes from all images in a directory tree')
+    parser.add_argument('input_dir', help='Directory to scan for images')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Output directory (default: <input_dir>/farbdieb_export)')
+    parser.add_argument('-f', '--format', default='json', choices=sorted(EXPORT_FORMATS),
+                        help='Export format per image (default: json)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Number of worker processes (default: CPU count)')
+    parser.add_argument('-n', '--num-colors', type=palette_size, default=30,
+                        help="Number of colors per image, or 'auto' to pick it per image (default: 30)")
+    parser.add_argument('--no-cluster', action='store_true',
+                        help='Use most frequent exact colors instead of k-means clustering')
+    parser.add_argument('--full-resolution', action='store_true',
+                        help='With --no-cluster, count colors over the full image instead of a 200x200 thumbnail')
+    parser.add_argument('--weighted', action='store_true',
+                        help='Cluster the color histogram with pixel counts as weights (much faster)')
+    parser.add_argument('-b', '--backend', default='kmeans', choices=sorted(QUANTIZERS),
+                        help='Quantizer backend used for clustering (default: kmeans)')
+    parser.add_argument('--space', default='rgb', choices=list(CLUSTER_SPACES),
+                        help='Color space to cluster in - lab/oklab need fewer colors (default: rgb)')
+    parser.add_argument('--sample-size', type=int, default=200,
+                        help='Side length of the thumbnail sampled for extraction (default: 200)')
+    parser.add_argument('--memory-budget', type=int, default=256,
+                        help='Working memory in MB for very large images (default: 256)')
+    parser.add_argument('--pantone-library', action='append', choices=available_pantone_libraries(),
+                        help='Pantone library to match against (repeatable, default: all available)')
+    parser.add_argument('--paint-brand', action='append',
+                        help='Only match oil paints of this brand (repeatable, default: all loaded catalogues)')
+    parser.add_argument('--paint-series', action='append', type=int,
+                        help='Only match oil paints of this price series (repeatable)')
+    parser.add_argument('--min-lightfastness', type=int, choices=range(1, 5),
+                        help='Only match oil paints with at least this lightfastness rating (1-4)')
+    parser.add_argument('--price-category', action='append', choices=PRICE_CATEGORIES,
+                        help='Only match oil paints of this price category (repeatable)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore and do not update the on-disk result cache')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only print errors')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"not a directory: {args.input_dir}")
+    if args.num_colors == 'auto' and args.no_cluster:
+        parser.error("--num-colors auto needs clustering (drop --no-cluster)")
+    if args.backend in RGB_ONLY_QUANTIZERS and args.space != 'rgb':
+        parser.error(f"the {args.backend} backend only clusters in rgb, not {args.space}")
+    output_dir = args.output or os.path.join(args.input_dir, 'farbdieb_export')
+    paint_filters = {name: value for name, value in (('brands', args.paint_brand), ('series', args.paint_series),
+                                                     ('min_lightfastness', args.min_lightfastness),
+                                                     ('price_categories', args.price_category))
+                     if value is not None}
+    if paint_filters:
+        try:
+            select_oil_paints(**paint_filters)
+        except ValueError as e:
+            parser.error(str(e))
+
+    stats = run_batch(args.input_dir, output_dir, fmt=args.format, workers=args.workers,
+                      quiet=args.quiet, use_cache=not args.no_cache, paint_filters=paint_filters,
+                      num_colors=args.num_colors, cluster=not args.no_cluster,
+                      full_resolution=args.full_resolution, weighted=args.weighted,
+                      sample_size=args.sample_size, backend=args.backend, space=args.space,
+                      memory_budget=args.memory_budget * 1024 * 1024,
+                      pantone_libraries=args.pantone_library)
+    return 1 if stats['failed'] else 0
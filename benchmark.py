@@ -0,0 +1,76 @@
+import argparse
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from color_spaces import srgb_to_lab
+from color_utils import CLUSTER_SPACES, QUANTIZERS, RGB_ONLY_QUANTIZERS, load_sample
+
+def palette_error(pixels: np.ndarray, palette: np.ndarray, chunk_size: int = 65536) -> float:
+    """Mean CIE76 Delta E from every source pixel to its nearest palette color"""
+    palette_lab = srgb_to_lab(np.clip(np.rint(palette), 0, 255))
+    total = 0.0
+    for start in range(0, len(pixels), chunk_size):
+        lab = srgb_to_lab(pixels[start:start + chunk_size])
+        distances = np.linalg.norm(lab[:, None, :] - palette_lab[None, :, :], axis=2)
+        total += float(distances.min(axis=1).sum())
+    return total / len(pixels)
+
+def benchmark_quantizers(image_paths: List[str], num_colors: int = 30, sample_size: int = 400,
+                         weighted: bool = True, repeat: int = 3,
+                         backends: Optional[List[str]] = None, space: str = 'rgb') -> List[Dict]:
+    """Time each quantizer backend and measure its palette error over the images"""
+    samples = [load_sample(path, sample_size) for path in image_paths]
+    results = []
+    if not backends:
+        backends = [name for name in QUANTIZERS if space == 'rgb' or name not in RGB_ONLY_QUANTIZERS]
+    for name in backends:
+        quantize = QUANTIZERS[name]
+        timings = []
+        errors = []
+        for pixels in samples:
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                palette = quantize(pixels, num_colors, weighted=weighted, space=space)
+                best = min(best, time.perf_counter() - start)
+            timings.append(best)
+            errors.append(palette_error(pixels, palette))
+        results.append({
+            'backend': name,
+            'ms_per_image': 1000 * float(np.mean(timings)),
+            'mean_delta_e': float(np.mean(errors))
+        })
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: python main.py benchmark <images...> [options]"""
+    parser = argparse.ArgumentParser(prog='farbdieb benchmark',
+                                     description='Compare quantizer backends by speed and palette error')
+    parser.add_argument('images', nargs='+', help='Images to benchmark on')
+    parser.add_argument('-n', '--num-colors', type=int, default=30,
+                        help='Number of colors per palette (default: 30)')
+    parser.add_argument('--sample-size', type=int, default=400,
+                        help='Side length of the sampled thumbnail (default: 400)')
+    parser.add_argument('--unweighted', action='store_true',
+                        help='Cluster raw pixels instead of the weighted color histogram')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Runs per image, the fastest counts (default: 3)')
+    parser.add_argument('-b', '--backend', action='append', choices=sorted(QUANTIZERS),
+                        help='Backend to include (repeatable, default: all)')
+    parser.add_argument('--space', default='rgb', choices=list(CLUSTER_SPACES),
+                        help='Color space to cluster in (default: rgb)')
+    args = parser.parse_args(argv)
+    rgb_only = [name for name in args.backend or () if name in RGB_ONLY_QUANTIZERS]
+    if rgb_only and args.space != 'rgb':
+        parser.error(f"{', '.join(rgb_only)} can only cluster in rgb, not {args.space}")
+
+    results = benchmark_quantizers(args.images, num_colors=args.num_colors,
+                                   sample_size=args.sample_size, weighted=not args.unweighted,
+                                   repeat=args.repeat, backends=args.backend, space=args.space)
+
+    print(f"{'Backend':<18} {'ms/image':>10} {'mean dE':>9}")
+    for result in results:
+        print(f"{result['backend']:<18} {result['ms_per_image']:>10.1f} {result['mean_delta_e']:>9.2f}")
+    return 0
@@ -0,0 +1,201 @@
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Dict, Iterable, Iterator, Optional
+
+from color_utils import extract_dominant_colors, extract_dominant_colors_progressive
+from color_theory import COMPREHENSIVE_SECTIONS, analyze
+from oil_paint_data import oil_paints_fingerprint
+from pantone_data import pantone_libraries_fingerprint
+
+# Bump when extraction or analysis output changes so stale entries are ignored
+CACHE_VERSION = 6
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def get_cache_dir(*parts: str) -> str:
+    """Base directory for FARBDIEB's on-disk caches (FARBDIEB_CACHE_DIR overrides)"""
+    base = os.environ.get('FARBDIEB_CACHE_DIR')
+    if not base:
+        xdg = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        base = os.path.join(xdg, 'farbdieb')
+    return os.path.join(base, *parts)
+
+@contextlib.contextmanager
+def atomic_write(path: str) -> Iterator[str]:
+    """Temporary path to write instead of path - renamed over it on success, removed on failure.
+
+    Write-then-rename, so concurrent readers and workers never see or map a
+    partial file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """Content-addressed, size-bounded LRU cache for extraction and analysis results.
+
+    Entries are keyed by the image content hash plus the extraction parameters
+    and stored as zlib-compressed pickles, one file per entry. File mtimes track
+    recency; once the directory grows past max_bytes the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or get_cache_dir('results')
+        self.max_bytes = max_bytes
+        self._size = None  # Lazily scanned estimate of the directory size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, image_path: str, **params) -> str:
+        """Cache key for an image file and the parameters it is processed with"""
+        # Pantone names depend on the library files too, not just the parameters
+        params['pantone'] = pantone_libraries_fingerprint(params.get('pantone_libraries'))
+        # Oil paint matches depend on the selected paints and catalogue files
+        params['oil_paints'] = oil_paints_fingerprint()
+        if 'sections' in params:
+            params['sections'] = sorted(params['sections'])
+        params = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(f"{CACHE_VERSION}:{hash_file(image_path)}:{params}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.bin')
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a cached result or None, marking the entry as recently used"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.loads(zlib.decompress(f.read()))
+            os.utime(path)
+            return result
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable cache entry {key}: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, key: str, result: Dict):
+        """Store a result, evicting least recently used entries if needed"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+        with atomic_write(path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes: Optional[int] = None):
+        """Remove least recently used entries until the cache fits target_bytes"""
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= target_bytes:
+                break
+            self._remove(path)
+            total -= size
+        self._size = total
+
+    def clear(self):
+        """Remove every cached entry"""
+        for path, _, _ in self._entries():
+            self._remove(path)
+        self._size = 0
+
+    def _entries(self):
+        """Yield (path, size, mtime) for every entry in the cache directory"""
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if filename.endswith('.bin'):
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue  # Evicted by another process
+                    yield path, stat.st_size, stat.st_mtime
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def extract_and_analyze(image_path: str, cache: Optional[ResultCache] = None,
+                        sections: Iterable[str] = COMPREHENSIVE_SECTIONS, **extract_options) -> Dict:
+    """Extract and analyze an image's palette, served from the cache when possible.
+
+    Returns a dict with hex_colors, rgb_colors, pantone_names and analysis
+    (one analysis per color with the requested sections, see
+    color_theory.analyze). Extra keyword arguments are passed on to
+    extract_dominant_colors; they and the sections are part of the cache key.
+    """
+    key = cache.key(image_path, sections=sections, **extract_options) if cache else None
+    if cache:
+        result = cache.get(key)
+        if result is not None:
+            return result
+
+    result = _analyze_palette(*extract_dominant_colors(image_path, **extract_options), sections=sections)
+    if cache:
+        cache.put(key, result)
+    return result
+
+def extract_and_analyze_progressive(image_path: str, cache: Optional[ResultCache] = None,
+                                    sections: Iterable[str] = COMPREHENSIVE_SECTIONS,
+                                    **extract_options) -> Iterator[Dict]:
+    """Like extract_and_analyze, but yields a coarse result before the refined one.
+
+    Every result carries a 'final' flag. A cache hit yields only the final
+    result; only the refined result is stored in the cache.
+    """
+    key = cache.key(image_path, sections=sections, **extract_options) if cache else None
+    if cache:
+        result = cache.get(key)
+        if result is not None:
+            yield dict(result, final=True)
+            return
+
+    for hex_colors, rgb_colors, pantone_names, final in extract_dominant_colors_progressive(
+            image_path, **extract_options):
+        result = _analyze_palette(hex_colors, rgb_colors, pantone_names, sections=sections)
+        if final and cache:
+            cache.put(key, result)
+        yield dict(result, final=final)
+
+def _analyze_palette(hex_colors, rgb_colors, pantone_names, sections=COMPREHENSIVE_SECTIONS) -> Dict:
+    """Bundle an extracted palette with one analysis per color"""
+    return {
+        'hex_colors': hex_colors,
+        'rgb_colors': rgb_colors,
+        'pantone_names': pantone_names,
+        'analysis': analyze(rgb_colors, sections)
+    }
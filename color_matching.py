@@ -0,0 +1,302 @@
+import hashlib
+import os
+
+import numpy as np
+
+from color_spaces import srgb_to_lab
+
+# References are pruned to this many Lab-nearest candidates before the
+# (much more expensive) perceptual metric is evaluated
+PREFILTER_CANDIDATES = 32
+
+# Libraries up to this size are prefiltered by brute force, larger ones via a KD-tree
+KDTREE_MIN_ENTRIES = 256
+
+DEFAULT_METRIC = 'ciede2000'
+
+# Images at least this large are deduplicated through a dense 24-bit map
+DENSE_LOOKUP_MIN_PIXELS = 1 << 20
+
+def delta_e_76(lab1, lab2):
+    """CIE76 color difference - Euclidean distance in Lab, broadcasting over (..., 3)"""
+    return np.linalg.norm(np.asarray(lab1, dtype=np.float64) - np.asarray(lab2, dtype=np.float64), axis=-1)
+
+def delta_e_94(lab1, lab2, kL=1.0, K1=0.045, K2=0.015):
+    """CIE94 color difference (graphic arts weights), lab1 is the reference"""
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    dL = lab1[..., 0] - lab2[..., 0]
+    C1 = np.hypot(lab1[..., 1], lab1[..., 2])
+    C2 = np.hypot(lab2[..., 1], lab2[..., 2])
+    dC = C1 - C2
+    da = lab1[..., 1] - lab2[..., 1]
+    db = lab1[..., 2] - lab2[..., 2]
+    dH_squared = np.maximum(da ** 2 + db ** 2 - dC ** 2, 0)
+    S_C = 1 + K1 * C1
+    S_H = 1 + K2 * C1
+    return np.sqrt((dL / kL) ** 2 + (dC / S_C) ** 2 + dH_squared / S_H ** 2)
+
+def delta_e_2000(lab1, lab2, kL=1.0, kC=1.0, kH=1.0):
+    """CIEDE2000 color difference (Sharma et al. 2005), broadcasting over (..., 3)"""
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    C_mean = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    C_mean7 = C_mean ** 7
+    G = 0.5 * (1 - np.sqrt(C_mean7 / (C_mean7 + 25.0 ** 7)))
+    a1p = (1 + G) * a1
+    a2p = (1 + G) * a2
+    C1p = np.hypot(a1p, b1)
+    C2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    dLp = L2 - L1
+    dCp = C2p - C1p
+    chroma_product = C1p * C2p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, np.where(dhp < -180, dhp + 360, dhp))
+    dhp = np.where(chroma_product == 0, 0, dhp)
+    dHp = 2 * np.sqrt(chroma_product) * np.sin(np.radians(dhp) / 2)
+
+    Lp_mean = (L1 + L2) / 2
+    Cp_mean = (C1p + C2p) / 2
+    h_sum = h1p + h2p
+    hp_mean = np.where(np.abs(h1p - h2p) > 180,
+                       np.where(h_sum < 360, h_sum + 360, h_sum - 360), h_sum) / 2
+    hp_mean = np.where(chroma_product == 0, h_sum, hp_mean)
+
+    T = (1 - 0.17 * np.cos(np.radians(hp_mean - 30))
+         + 0.24 * np.cos(np.radians(2 * hp_mean))
+         + 0.32 * np.cos(np.radians(3 * hp_mean + 6))
+         - 0.20 * np.cos(np.radians(4 * hp_mean - 63)))
+    d_theta = 30 * np.exp(-(((hp_mean - 275) / 25) ** 2))
+    Cp_mean7 = Cp_mean ** 7
+    R_C = 2 * np.sqrt(Cp_mean7 / (Cp_mean7 + 25.0 ** 7))
+    L_offset = (Lp_mean - 50) ** 2
+    S_L = 1 + 0.015 * L_offset / np.sqrt(20 + L_offset)
+    S_C = 1 + 0.045 * Cp_mean
+    S_H = 1 + 0.015 * Cp_mean * T
+    R_T = -np.sin(np.radians(2 * d_theta)) * R_C
+
+    L_term = dLp / (kL * S_L)
+    C_term = dCp / (kC * S_C)
+    H_term = dHp / (kH * S_H)
+    return np.sqrt(np.maximum(L_term ** 2 + C_term ** 2 + H_term ** 2 + R_T * C_term * H_term, 0))
+
+METRICS = {
+    'cie76': delta_e_76,
+    'cie94': delta_e_94,
+    'ciede2000': delta_e_2000
+}
+
+class LabMatcher:
+    """Perceptual nearest-neighbour search over a fixed reference library.
+
+    References are held as a precomputed Lab array. A query first keeps the
+    PREFILTER_CANDIDATES references closest in plain Lab distance (brute force
+    or KD-tree) and evaluates the chosen metric only on those.
+    """
+
+    def __init__(self, lab, tree=None):
+        self.lab = np.ascontiguousarray(lab, dtype=np.float64).reshape(-1, 3)
+        self._squared_norms = np.einsum('ij,ij->i', self.lab, self.lab)
+        # A KD-tree over the same Lab data can be passed in (e.g. loaded from disk)
+        self._tree = tree
+        if tree is None and len(self.lab) > KDTREE_MIN_ENTRIES:
+            try:
+                from scipy.spatial import cKDTree
+                self._tree = cKDTree(self.lab)
+            except ImportError:
+                pass
+
+    @property
+    def tree(self):
+        """The KD-tree used for prefiltering, or None for brute force"""
+        return self._tree
+
+    @classmethod
+    def from_rgb(cls, rgb):
+        return cls(srgb_to_lab(np.asarray(rgb).reshape(-1, 3)))
+
+    def __len__(self):
+        return len(self.lab)
+
+    def _candidates(self, queries, k):
+        """(N, k) indices of the references nearest in Lab-Euclidean distance"""
+        if self._tree is not None:
+            _, indices = self._tree.query(queries, k=k)
+            return indices.reshape(len(queries), k)
+        # |q - r|^2 up to the per-query constant |q|^2
+        squared = self._squared_norms[None, :] - 2 * queries @ self.lab.T
+        if k >= len(self.lab):
+            return np.broadcast_to(np.arange(len(self.lab)), squared.shape)
+        return np.argpartition(squared, k - 1, axis=1)[:, :k]
+
+    def query(self, lab, metric=DEFAULT_METRIC, candidates=PREFILTER_CANDIDATES, chunk_size=4096):
+        """Return (indices, distances) of the nearest reference for each (N, 3) Lab query"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown color difference metric: {metric}")
+        queries = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+        k = min(candidates, len(self.lab)) if metric != 'cie76' else 1
+
+        indices = np.empty(len(queries), dtype=np.intp)
+        distances = np.empty(len(queries), dtype=np.float64)
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            candidate_indices = self._candidates(chunk, k)
+            scores = METRICS[metric](self.lab[candidate_indices], chunk[:, None, :])
+            best = np.argmin(scores, axis=1)
+            rows = np.arange(len(chunk))
+            indices[start:start + chunk_size] = candidate_indices[rows, best]
+            distances[start:start + chunk_size] = scores[rows, best]
+        return indices, distances
+
+    def query_rgb(self, rgb, **options):
+        """Like query, for (N, 3) sRGB values 0-255"""
+        return self.query(srgb_to_lab(np.asarray(rgb).reshape(-1, 3)), **options)
+
+    def nearest(self, lab, count, metric=DEFAULT_METRIC, candidates=PREFILTER_CANDIDATES, chunk_size=4096):
+        """(N, count) indices of the nearest references for each Lab query, closest first"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown color difference metric: {metric}")
+        queries = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+        count = min(count, len(self.lab))
+        k = min(max(candidates, count), len(self.lab))
+
+        result = np.empty((len(queries), count), dtype=np.intp)
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            candidate_indices = self._candidates(chunk, k)
+            scores = METRICS[metric](self.lab[candidate_indices], chunk[:, None, :])
+            order = np.argsort(scores, axis=1)[:, :count]
+            result[start:start + chunk_size] = np.take_along_axis(candidate_indices, order, axis=1)
+        return result
+
+    def checksum(self, *extra):
+        """Content hash of the reference library (plus any extra parameters)"""
+        digest = hashlib.sha256(self.lab.tobytes())
+        for part in extra:
+            digest.update(repr(part).encode())
+        return digest.hexdigest()
+
+class MatchLookupTable:
+    """Precomputed nearest-reference table over a quantized RGB grid.
+
+    The table holds, for every cell of a (2**bits)^3 grid, the `refine`
+    references nearest to the cell center as uint16 indices. Lookups are a
+    gather; with refine > 1 the exact metric is then evaluated on the few
+    stored candidates for each pixel. bits=8 covers all 16.7M colors exactly.
+    """
+
+    def __init__(self, matcher, table, bits, metric=DEFAULT_METRIC):
+        self.matcher = matcher
+        self.table = table
+        self.bits = bits
+        self.metric = metric
+
+    @property
+    def refine(self):
+        return self.table.shape[1]
+
+    def cells(self, rgb):
+        """Grid cell of each (N, 3) uint8 color"""
+        rgb = np.asarray(rgb).reshape(-1, 3).astype(np.intp)
+        shift = 8 - self.bits
+        return ((rgb[:, 0] >> shift) << (2 * self.bits)) | ((rgb[:, 1] >> shift) << self.bits) | (rgb[:, 2] >> shift)
+
+    def lookup(self, rgb, return_distance=False, chunk_size=1 << 18):
+        """Indices of the nearest references for (N, 3) sRGB colors 0-255"""
+        rgb = np.asarray(rgb).reshape(-1, 3)
+        if self.refine == 1 and not return_distance:
+            return self.table[self.cells(rgb), 0].astype(np.intp)
+
+        indices = np.empty(len(rgb), dtype=np.intp)
+        distances = np.empty(len(rgb), dtype=np.float64)
+        for start in range(0, len(rgb), chunk_size):
+            chunk = rgb[start:start + chunk_size]
+            candidates = self.table[self.cells(chunk)].astype(np.intp)
+            scores = METRICS[self.metric](self.matcher.lab[candidates], srgb_to_lab(chunk)[:, None, :])
+            best = np.argmin(scores, axis=1)
+            rows = np.arange(len(chunk))
+            indices[start:start + chunk_size] = candidates[rows, best]
+            distances[start:start + chunk_size] = scores[rows, best]
+        return (indices, distances) if return_distance else indices
+
+    def lookup_image(self, pixels):
+        """Match an (H, W, 3) image pixel by pixel, returning an (H, W) index array"""
+        pixels = np.asarray(pixels)
+        if self.refine == 1:
+            return self.lookup(pixels).reshape(pixels.shape[:-1])
+        # Photos repeat colors heavily - refine each distinct color once
+        packed = pixels.reshape(-1, 3).astype(np.uint32)
+        packed = (packed[:, 0] << 16) | (packed[:, 1] << 8) | packed[:, 2]
+        if len(packed) >= DENSE_LOOKUP_MIN_PIXELS:
+            # Linear-time dedup through a dense 24-bit map instead of sorting
+            present = np.zeros(1 << 24, dtype=bool)
+            present[packed] = True
+            unique = np.flatnonzero(present).astype(np.uint32)
+            matches = np.zeros(1 << 24, dtype=np.uint16)
+            matches[unique] = self.lookup(self._unpack(unique))
+            return matches[packed].astype(np.intp).reshape(pixels.shape[:-1])
+        unique, inverse = np.unique(packed, return_inverse=True)
+        return self.lookup(self._unpack(unique))[inverse].reshape(pixels.shape[:-1])
+
+    @staticmethod
+    def _unpack(packed):
+        return np.stack([packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF], axis=1)
+
+def build_lookup_table(matcher, path, bits=6, refine=4, metric=DEFAULT_METRIC, chunk_size=1 << 16):
+    """Compute a lookup table for the matcher and write it to path as raw uint16"""
+    if len(matcher) > np.iinfo(np.uint16).max + 1:
+        raise ValueError(f"Library too large for a uint16 lookup table: {len(matcher)} entries")
+    if not 1 <= bits <= 8:
+        raise ValueError(f"Lookup table bits must be 1-8, got {bits}")
+    levels = 1 << bits
+    refine = min(refine, len(matcher))
+    # Sample each cell at its center
+    centers = (np.arange(levels) << (8 - bits)) + ((1 << (8 - bits)) - 1) / 2
+
+    from cache_utils import atomic_write
+
+    with atomic_write(path) as tmp_path:
+        table = np.memmap(tmp_path, dtype='<u2', mode='w+', shape=(levels ** 3, refine))
+        for start in range(0, levels ** 3, chunk_size):
+            cells = np.arange(start, min(start + chunk_size, levels ** 3))
+            rgb = np.stack([centers[cells >> (2 * bits)], centers[(cells >> bits) & (levels - 1)],
+                            centers[cells & (levels - 1)]], axis=1)
+            table[start:start + len(cells)] = matcher.nearest(srgb_to_lab(rgb), refine, metric=metric)
+        table.flush()
+        del table
+
+def get_lookup_table(matcher, bits=6, refine=4, metric=DEFAULT_METRIC, name='library'):
+    """Memory-map the matcher's lookup table, building it on first use.
+
+    Tables live in the cache directory keyed by the library name, the table
+    parameters and a checksum of the library, so a changed library gets a
+    fresh table automatically. Building it deletes the tables of earlier
+    versions of the same library and parameters.
+    """
+    # Cache location lives with the result cache; only needed on this path
+    from cache_utils import get_cache_dir
+
+    if bits == 8:
+        refine = 1  # Every color has its own cell - nothing left to refine
+    refine = min(refine, len(matcher))
+    cache_dir = get_cache_dir('lookup')
+    prefix = f"{name}-{bits}-{refine}-{metric}-"
+    path = os.path.join(cache_dir, f"{prefix}{matcher.checksum(bits, refine, metric)[:24]}.u16")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        build_lookup_table(matcher, path, bits=bits, refine=refine, metric=metric)
+        for filename in os.listdir(cache_dir):
+            stale = os.path.join(cache_dir, filename)
+            if filename.startswith(prefix) and filename.endswith('.u16') and stale != path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass  # Still mapped elsewhere (Windows) - removed on a later build
+    table = np.memmap(path, dtype='<u2', mode='r').reshape(-1, refine)
+    return MatchLookupTable(matcher, table, bits, metric=metric)
@@ -0,0 +1,150 @@
+import numpy as np
+
+# Linear sRGB -> CIE XYZ (D65 reference white, IEC 61966-2-1)
+SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041]
+])
+XYZ_TO_SRGB = np.linalg.inv(SRGB_TO_XYZ)
+
+D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+D50_WHITE = np.array([0.96422, 1.0, 0.82521])
+
+WHITE_POINTS = {
+    'D65': D65_WHITE,
+    'D50': D50_WHITE
+}
+
+# XYZ -> cone response domain for Bradford chromatic adaptation
+BRADFORD = np.array([
+    [0.8951, 0.2664, -0.1614],
+    [-0.7502, 1.7135, 0.0367],
+    [0.0389, -0.0685, 1.0296]
+])
+
+# OKLab (Ottosson 2020): linear sRGB -> LMS cone response, cube-rooted LMS -> Lab
+OKLAB_M1 = np.array([
+    [0.4122214708, 0.5363325363, 0.0514459929],
+    [0.2119034982, 0.6806995451, 0.1073969566],
+    [0.0883024619, 0.2817188376, 0.6299787005]
+])
+OKLAB_M2 = np.array([
+    [0.2104542553, 0.7936177850, -0.0040720468],
+    [1.9779984951, -2.4285922050, 0.4505937099],
+    [0.0259040371, 0.7827717662, -0.8086757660]
+])
+OKLAB_M1_INV = np.linalg.inv(OKLAB_M1)
+OKLAB_M2_INV = np.linalg.inv(OKLAB_M2)
+
+# CIE constants for the linear segment of the Lab transfer function
+LAB_EPSILON = 216 / 24389
+LAB_KAPPA = 24389 / 27
+
+def _companding_table():
+    c = np.arange(256) / 255.0
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+# Linearized value of every 8-bit channel level
+_SRGB_TO_LINEAR_TABLE = _companding_table()
+
+def white_point(white):
+    """A white point as XYZ array, given by name ('D65', 'D50') or value"""
+    if isinstance(white, str):
+        try:
+            return WHITE_POINTS[white.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown white point: {white}") from None
+    return np.asarray(white, dtype=np.float64)
+
+def chromatic_adaptation_matrix(source='D65', target='D50'):
+    """Bradford matrix mapping XYZ under the source white to the target white"""
+    source_cone = BRADFORD @ white_point(source)
+    target_cone = BRADFORD @ white_point(target)
+    return np.linalg.inv(BRADFORD) @ np.diag(target_cone / source_cone) @ BRADFORD
+
+def adapt_xyz(xyz, source='D65', target='D50'):
+    """Chromatically adapt (..., 3) XYZ values between white points (Bradford)"""
+    xyz = np.asarray(xyz, dtype=np.float64)
+    if np.array_equal(white_point(source), white_point(target)):
+        return xyz
+    return xyz @ chromatic_adaptation_matrix(source, target).T
+
+def srgb_to_linear(rgb):
+    """Undo sRGB gamma companding - (..., 3) values 0-255 -> linear 0-1"""
+    rgb = np.asarray(rgb)
+    if rgb.dtype == np.uint8:
+        # Table lookup is several times faster than the power function on images
+        return _SRGB_TO_LINEAR_TABLE[rgb]
+    c = rgb.astype(np.float64) / 255.0
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+def linear_to_srgb(linear):
+    """Apply sRGB gamma companding - (..., 3) linear 0-1 -> values 0-255 (unclipped floats)"""
+    c = np.asarray(linear, dtype=np.float64)
+    companded = np.where(c <= 0.0031308, 12.92 * c, 1.055 * np.abs(c) ** (1 / 2.4) * np.sign(c) - 0.055)
+    return companded * 255.0
+
+def srgb_to_xyz(rgb, white='D65'):
+    """Convert (..., 3) sRGB values 0-255 to CIE XYZ (Y of white = 1)"""
+    return adapt_xyz(srgb_to_linear(rgb) @ SRGB_TO_XYZ.T, 'D65', white)
+
+def xyz_to_srgb(xyz, white='D65'):
+    """Convert (..., 3) CIE XYZ to sRGB values 0-255 (unclipped floats)"""
+    return linear_to_srgb(adapt_xyz(xyz, white, 'D65') @ XYZ_TO_SRGB.T)
+
+def xyz_to_lab(xyz, white=D65_WHITE):
+    """Convert (..., 3) CIE XYZ to CIELAB relative to the given white point"""
+    t = np.asarray(xyz, dtype=np.float64) / white_point(white)
+    f = np.where(t > LAB_EPSILON, np.cbrt(t), (LAB_KAPPA * t + 16) / 116)
+    L = 116 * f[..., 1] - 16
+    a = 500 * (f[..., 0] - f[..., 1])
+    b = 200 * (f[..., 1] - f[..., 2])
+    return np.stack([L, a, b], axis=-1)
+
+def lab_to_xyz(lab, white=D65_WHITE):
+    """Convert (..., 3) CIELAB back to CIE XYZ relative to the given white point"""
+    lab = np.asarray(lab, dtype=np.float64)
+    fy = (lab[..., 0] + 16) / 116
+    f = np.stack([fy + lab[..., 1] / 500, fy, fy - lab[..., 2] / 200], axis=-1)
+    t = np.where(f ** 3 > LAB_EPSILON, f ** 3, (116 * f - 16) / LAB_KAPPA)
+    # Lightness decides Y directly (avoids the cube on the linear segment)
+    t[..., 1] = np.where(lab[..., 0] > LAB_KAPPA * LAB_EPSILON, fy ** 3, lab[..., 0] / LAB_KAPPA)
+    return t * white_point(white)
+
+def srgb_to_lab(rgb, white='D65'):
+    """Convert (..., 3) sRGB values 0-255 to CIELAB (D65 unless another white is given)"""
+    return xyz_to_lab(srgb_to_xyz(rgb, white), white)
+
+def lab_to_srgb(lab, white='D65'):
+    """Convert (..., 3) CIELAB to sRGB values 0-255 (unclipped floats)"""
+    return xyz_to_srgb(lab_to_xyz(lab, white), white)
+
+def lab_to_lch(lab):
+    """Convert (..., 3) CIELAB to cylindrical LCh (hue in degrees 0-360)"""
+    lab = np.asarray(lab, dtype=np.float64)
+    C = np.hypot(lab[..., 1], lab[..., 2])
+    h = np.degrees(np.arctan2(lab[..., 2], lab[..., 1])) % 360
+    return np.stack([lab[..., 0], C, h], axis=-1)
+
+def lch_to_lab(lch):
+    """Convert (..., 3) LCh (hue in degrees) back to CIELAB"""
+    lch = np.asarray(lch, dtype=np.float64)
+    h = np.radians(lch[..., 2])
+    return np.stack([lch[..., 0], lch[..., 1] * np.cos(h), lch[..., 1] * np.sin(h)], axis=-1)
+
+def srgb_to_lch(rgb, white='D65'):
+    return lab_to_lch(srgb_to_lab(rgb, white))
+
+def lch_to_srgb(lch, white='D65'):
+    return lab_to_srgb(lch_to_lab(lch), white)
+
+def srgb_to_oklab(rgb):
+    """Convert (..., 3) sRGB values 0-255 to OKLab (L 0-1)"""
+    lms = srgb_to_linear(rgb) @ OKLAB_M1.T
+    return np.cbrt(lms) @ OKLAB_M2.T
+
+def oklab_to_srgb(oklab):
+    """Convert (..., 3) OKLab back to sRGB values 0-255 (unclipped floats)"""
+    lms = (np.asarray(oklab, dtype=np.float64) @ OKLAB_M2_INV.T) ** 3
+    return linear_to_srgb(lms @ OKLAB_M1_INV.T)
@@ -1,5 +1,7 @@
 import colorsys
 import math
+import threading
+from functools import lru_cache
 from typing import List, Tuple, Dict
 
 def rgb_to_hsl(r: int, g: int, b: int) -> Tuple[int, int, int]:
@@ -20,22 +22,100 @@ def rgb_to_cmyk(r: int, g: int, b: int) -> Tuple[int, int, int, int]:
     
     return (int(c*100), int(m*100), int(y*100), int(k*100))
 
+@lru_cache(maxsize=None)
+def _lab_constants():
+    """sRGB -> XYZ rows, D65 white and Lab segment constants as plain floats for the scalar path"""
+    # color_spaces loads numpy - only on the first conversion, not on import
+    from color_spaces import D65_WHITE, LAB_EPSILON, LAB_KAPPA, SRGB_TO_XYZ
+    return SRGB_TO_XYZ.tolist(), D65_WHITE.tolist(), LAB_EPSILON, LAB_KAPPA
+
+def _srgb_channel_to_linear(c: float) -> float:
+    """Undo sRGB gamma companding for one channel 0-1"""
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+def _lab_f(t: float, epsilon: float, kappa: float) -> float:
+    """CIE Lab transfer function, with the linear segment near black"""
+    return t ** (1/3) if t > epsilon else (kappa * t + 16) / 116
+
 def rgb_to_lab(r: int, g: int, b: int) -> Tuple[int, int, int]:
-    """Convert RGB to LAB (simplified approximation)"""
-    # Simplified LAB conversion for demonstration
-    r, g, b = r/255.0, g/255.0, b/255.0
-    
-    # Convert to XYZ first (simplified)
-    x = r * 0.4124 + g * 0.3576 + b * 0.1805
-    y = r * 0.2126 + g * 0.7152 + b * 0.0722
-    z = r * 0.0193 + g * 0.1192 + b * 0.9505
-    
-    # Convert to LAB (simplified)
-    l = int(116 * (y ** (1/3)) - 16) if y > 0.008856 else int(903.3 * y)
-    a = int(500 * ((x ** (1/3)) - (y ** (1/3))))
-    b_lab = int(200 * ((y ** (1/3)) - (z ** (1/3))))
-    
-    return (max(0, min(100, l)), max(-128, min(127, a)), max(-128, min(127, b_lab)))
+    """Convert sRGB to CIELAB (D65)"""
+    # Pure Python on purpose - a single color is faster without NumPy
+    r, g, b = (_srgb_channel_to_linear(c / 255.0) for c in (r, g, b))
+    ((m0, m1, m2), (m3, m4, m5), (m6, m7, m8)), (wx, wy, wz), epsilon, kappa = _lab_constants()
+
+    fx = _lab_f((r * m0 + g * m1 + b * m2) / wx, epsilon, kappa)
+    fy = _lab_f((r * m3 + g * m4 + b * m5) / wy, epsilon, kappa)
+    fz = _lab_f((r * m6 + g * m7 + b * m8) / wz, epsilon, kappa)
+
+    return (round(116 * fy - 16), round(500 * (fx - fy)), round(200 * (fy - fz)))
+
+# Array versions of the conversions above - whole palettes or images in one pass,
+# matching the scalar results exactly. numpy is imported on first use, so
+# importing this module stays cheap
+
+def _as_rgb_array(rgb):
+    """(..., 3) RGB values 0-255 as floats 0-1"""
+    import numpy as np
+    return np.asarray(rgb, dtype=np.float64) / 255.0
+
+def rgb_to_hsl_array(rgb):
+    """Convert (..., 3) RGB values to integer HSL (H 0-359, S and L 0-100) in one pass"""
+    import numpy as np
+    rgb = _as_rgb_array(rgb)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    # Same arithmetic as colorsys.rgb_to_hls, so results match it exactly
+    maxc = rgb.max(axis=-1)
+    minc = rgb.min(axis=-1)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+    gray = rangec == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(l <= 0.5, rangec / sumc, rangec / (2.0 - maxc - minc))
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = (h / 6.0) % 1.0
+    h = np.where(gray, 0.0, h)
+    s = np.where(gray, 0.0, s)
+    return np.stack([h * 360, s * 100, l * 100], axis=-1).astype(int)
+
+def hsl_to_rgb_array(hsl):
+    """Convert (..., 3) HSL values (H degrees, S and L 0-100) to integer RGB 0-255"""
+    import numpy as np
+    hsl = np.asarray(hsl, dtype=np.float64)
+    h, s, l = hsl[..., 0] / 360, hsl[..., 1] / 100, hsl[..., 2] / 100
+    # Same arithmetic as colorsys.hls_to_rgb
+    m2 = np.where(l <= 0.5, l * (1.0 + s), l + s - (l * s))
+    m1 = 2.0 * l - m2
+
+    def channel(hue):
+        hue = hue % 1.0
+        return np.where(hue < 1 / 6, m1 + (m2 - m1) * hue * 6.0,
+                        np.where(hue < 0.5, m2,
+                                 np.where(hue < 2 / 3, m1 + (m2 - m1) * (2 / 3 - hue) * 6.0, m1)))
+
+    rgb = np.stack([channel(h + 1 / 3), channel(h), channel(h - 1 / 3)], axis=-1)
+    rgb = np.where((s == 0)[..., None], l[..., None], rgb)
+    return (rgb * 255).astype(int)
+
+def rgb_to_cmyk_array(rgb):
+    """Convert (..., 3) RGB values to integer CMYK percentages in one pass"""
+    import numpy as np
+    rgb = _as_rgb_array(rgb)
+    k = 1 - rgb.max(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cmy = (1 - rgb - k[..., None]) / (1 - k)[..., None]
+    # Pure black has no chromatic component
+    cmy = np.where((k == 1)[..., None], 0.0, cmy)
+    return (np.concatenate([cmy, k[..., None]], axis=-1) * 100).astype(int)
+
+def rgb_to_lab_array(rgb):
+    """Convert (..., 3) sRGB values to integer CIELAB (D65) in one pass"""
+    import numpy as np
+    from color_spaces import srgb_to_lab
+    return np.rint(srgb_to_lab(rgb)).astype(int)
 
 class GoetheFarbenlehre:
     """Goethe's Color Theory - psychological and aesthetic color analysis"""
@@ -75,6 +155,8 @@ class GoetheFarbenlehre:
         analysis = GoetheFarbenlehre.COLOR_EMOTIONS.get(base_color, {
             'emotion': 'Neutral', 'character': 'Ausgeglichen', 'effect': 'Harmonisch'
         })
+        # Work on a copy - the shared COLOR_EMOTIONS entries must stay untouched
+        analysis = dict(analysis)
         
         # Modify based on saturation and lightness
         if s < 30:
@@ -130,67 +212,244 @@ class IttenFarbkreis:
         return analogous
 
 class ColorBlindnessSimulator:
-    """Simulate different types of color blindness"""
+    """Simulate different types of color blindness (Machado et al. 2009, linear RGB)"""
+    
+    @staticmethod
+    def simulate(pixels, deficiency: str, severity: float = None):
+        """Simulate a deficiency on a whole (..., 3) image or palette in one pass.
+
+        deficiency is one of color_vision.DEFICIENCIES; severity (0-1) applies
+        to the -anomaly types.
+        """
+        from color_vision import simulate_color_vision
+        return simulate_color_vision(pixels, deficiency, severity)
+    
+    @staticmethod
+    def _simulate_color(rgb: Tuple[int, int, int], deficiency: str) -> Tuple[int, int, int]:
+        return tuple(int(c) for c in ColorBlindnessSimulator.simulate([rgb], deficiency)[0])
     
     @staticmethod
     def simulate_protanopia(rgb: Tuple[int, int, int]) -> Tuple[int, int, int]:
         """Simulate red color blindness (Protanopia)"""
-        r, g, b = rgb
-        # Simplified protanopia simulation
-        new_r = int(0.567 * r + 0.433 * g)
-        new_g = int(0.558 * r + 0.442 * g) 
-        new_b = int(0.242 * g + 0.758 * b)
-        return (min(255, new_r), min(255, new_g), min(255, new_b))
+        return ColorBlindnessSimulator._simulate_color(rgb, 'protanopia')
     
     @staticmethod
     def simulate_deuteranopia(rgb: Tuple[int, int, int]) -> Tuple[int, int, int]:
         """Simulate green color blindness (Deuteranopia)"""
-        r, g, b = rgb
-        # Simplified deuteranopia simulation
-        new_r = int(0.625 * r + 0.375 * g)
-        new_g = int(0.7 * r + 0.3 * g)
-        new_b = int(0.3 * g + 0.7 * b)
-        return (min(255, new_r), min(255, new_g), min(255, new_b))
+        return ColorBlindnessSimulator._simulate_color(rgb, 'deuteranopia')
     
     @staticmethod
     def simulate_tritanopia(rgb: Tuple[int, int, int]) -> Tuple[int, int, int]:
         """Simulate blue color blindness (Tritanopia)"""
-        r, g, b = rgb
-        # Simplified tritanopia simulation  
-        new_r = int(0.95 * r + 0.05 * g)
-        new_g = int(0.433 * g + 0.567 * b)
-        new_b = int(0.475 * g + 0.525 * b)
-        return (min(255, new_r), min(255, new_g), min(255, new_b))
+        return ColorBlindnessSimulator._simulate_color(rgb, 'tritanopia')
 
-def get_comprehensive_color_analysis(rgb: Tuple[int, int, int]) -> Dict:
-    """Get comprehensive color analysis combining all theories"""
+# Distinct colors whose analysis sections are kept in memory (a few KB each)
+ANALYSIS_CACHE_SIZE = 4096
+
+class FrozenDict(dict):
+    """Read-only dict - analysis results are shared between callers through the cache.
+
+    Still a dict, so json.dump, pickle and read access work unchanged; use
+    dict(result) or copy() for a mutable copy.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def __hash__(self):
+        # Order-independent, like dict equality
+        return hash(frozenset(self.items()))
+
+def _freeze(value):
+    """Recursively turn dicts into FrozenDicts and lists into tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _format_basic(rgb, hsl, cmyk, lab) -> Dict:
     r, g, b = rgb
-    
+    return {
+        'hex': f'#{r:02x}{g:02x}{b:02x}'.upper(),
+        'rgb': f'RGB({r}, {g}, {b})',
+        'hsl': f'HSL{tuple(hsl)}',
+        'cmyk': f'CMYK{tuple(cmyk)}',
+        'lab': f'LAB{tuple(lab)}'
+    }
+
+def _basic_section(rgb: Tuple[int, int, int]) -> Dict:
+    batch = _palette_batch('basic')
+    if batch is not None:
+        return batch.get(rgb)
+    r, g, b = rgb
+    return _format_basic(rgb, rgb_to_hsl(r, g, b), rgb_to_cmyk(r, g, b), rgb_to_lab(r, g, b))
+
+def _basic_sections(colors) -> List[Dict]:
+    """Basic sections of a whole palette, converted in one array pass"""
+    hsl = rgb_to_hsl_array(colors).tolist()
+    cmyk = rgb_to_cmyk_array(colors).tolist()
+    lab = rgb_to_lab_array(colors).tolist()
+    return [_format_basic(*values) for values in zip(colors, hsl, cmyk, lab)]
+
+def _itten_section(rgb: Tuple[int, int, int]) -> Dict:
+    batch = _palette_batch('itten')
+    if batch is not None:
+        return batch.get(rgb)
+    return {
+        'complementary': IttenFarbkreis.get_complementary_color(rgb),
+        'triadic': IttenFarbkreis.get_triadic_colors(rgb),
+        'analogous': IttenFarbkreis.get_analogous_colors(rgb)
+    }
+
+# Hue offsets of the Itten relationships: complementary, triadic, analogous
+_ITTEN_OFFSETS = (180, 120, 240, -30, 30)
+
+def _itten_sections(colors) -> List[Dict]:
+    """Itten sections of a whole palette - every hue rotation in one array pass"""
+    hsl = rgb_to_hsl_array(colors)
+    rotated = hsl[:, None, :].repeat(len(_ITTEN_OFFSETS), axis=1)
+    rotated[..., 0] = (rotated[..., 0] + _ITTEN_OFFSETS) % 360
+    return [{
+        'complementary': tuple(related[0]),
+        'triadic': [tuple(related[1]), tuple(related[2])],
+        'analogous': [tuple(related[3]), tuple(related[4])]
+    } for related in hsl_to_rgb_array(rotated).tolist()]
+
+class _PaletteBatch:
+    """Matches the rest of a palette in one batch call when the first uncached color is requested"""
+
+    def __init__(self, colors, match_batch):
+        self.colors = colors
+        self.match_batch = match_batch
+        self.positions = {}
+        for i, rgb in enumerate(colors):
+            self.positions.setdefault(rgb, i)
+        self.results = {}
+
+    def get(self, rgb):
+        if rgb not in self.results:
+            # Colors before this one were cache hits - only match from here on
+            rest = list(dict.fromkeys(self.colors[self.positions.get(rgb, 0):]))
+            if rgb not in rest:
+                rest = [rgb]
+            matches = self.match_batch(rest)
+            self.results.update((color, (matches, i)) for i, color in enumerate(rest))
+        matches, i = self.results[rgb]
+        return matches[i]
+
+# Palette the current thread is analyzing: section -> _PaletteBatch (see analyze)
+_palette = threading.local()
+
+def _palette_batch(section: str):
+    batches = getattr(_palette, 'batches', None)
+    return batches.get(section) if batches else None
+
+def _oil_paint_section(rgb: Tuple[int, int, int]):
     # Import oil paint analysis
     try:
-        from oil_paint_data import rgb_to_oil_paint_match
-        oil_paint_analysis = rgb_to_oil_paint_match(rgb)
+        from oil_paint_data import match_oil_paints
     except ImportError:
-        oil_paint_analysis = None
-    
-    analysis = {
-        'basic': {
-            'hex': f'#{r:02x}{g:02x}{b:02x}'.upper(),
-            'rgb': f'RGB({r}, {g}, {b})',
-            'hsl': f'HSL{rgb_to_hsl(r, g, b)}',
-            'cmyk': f'CMYK{rgb_to_cmyk(r, g, b)}',
-            'lab': f'LAB{rgb_to_lab(r, g, b)}'
-        },
-        'goethe': GoetheFarbenlehre.analyze_color_psychology(rgb),
-        'itten': {
-            'complementary': IttenFarbkreis.get_complementary_color(rgb),
-            'triadic': IttenFarbkreis.get_triadic_colors(rgb),
-            'analogous': IttenFarbkreis.get_analogous_colors(rgb)
-        }
-    }
-    
-    # Add oil paint analysis if available
-    if oil_paint_analysis:
-        analysis['oil_paints'] = oil_paint_analysis
-    
-    return analysis 
\ No newline at end of file
+        return None
+    batch = _palette_batch('oil_paints')
+    if batch is not None:
+        return batch.get(rgb)
+    return match_oil_paints([rgb]).match(0)
+
+# Per-color analysis sections: name -> function(rgb) -> data (None = not available)
+ANALYSIS_SECTIONS = {
+    'basic': _basic_section,
+    'goethe': GoetheFarbenlehre.analyze_color_psychology,
+    'itten': _itten_section,
+    'oil_paints': _oil_paint_section
+}
+
+# Matched against the selected libraries for the whole palette at once, so
+# it isn't memoized per color
+PANTONE_SECTION = 'pantone'
+
+# What get_comprehensive_color_analysis computes
+COMPREHENSIVE_SECTIONS = ('basic', 'goethe', 'itten', 'oil_paints')
+
+def _section_plan(sections) -> List[str]:
+    """Validate requested sections and put them in canonical order"""
+    sections = set(sections)
+    unknown = sections - set(ANALYSIS_SECTIONS) - {PANTONE_SECTION}
+    if unknown:
+        raise ValueError(f"Unknown analysis sections: {', '.join(sorted(unknown))}")
+    return [name for name in list(ANALYSIS_SECTIONS) + [PANTONE_SECTION] if name in sections]
+
+def analyze(colors, sections=COMPREHENSIVE_SECTIONS) -> List[Dict]:
+    """Analyze a palette, computing only the requested sections.
+
+    sections is any subset of ANALYSIS_SECTIONS plus 'pantone'; web token
+    exports e.g. only need {'basic'} and skip the oil-paint and psychology
+    work entirely. Sections are memoized per RGB value, so asking for more
+    sections of a color later only computes the missing ones.
+    """
+    plan = _section_plan(sections)
+    colors = [tuple(int(c) for c in rgb) for rgb in colors]
+    pantone_names = None
+    if PANTONE_SECTION in plan and colors:
+        from pantone_data import rgb_to_pantone_names
+        pantone_names = rgb_to_pantone_names(colors)
+
+    # Uncached sections are computed for the rest of the palette at once
+    batches = {}
+    if len(colors) > 1:
+        if 'basic' in plan:
+            batches['basic'] = _PaletteBatch(colors, _basic_sections)
+        if 'itten' in plan:
+            batches['itten'] = _PaletteBatch(colors, _itten_sections)
+        if 'oil_paints' in plan:
+            try:
+                from oil_paint_data import match_oil_paints
+                batches['oil_paints'] = _PaletteBatch(colors, match_oil_paints)
+            except ImportError:
+                pass
+    _palette.batches = batches
+    try:
+        analyses = []
+        for i, rgb in enumerate(colors):
+            analysis = {}
+            for name in plan:
+                if name == PANTONE_SECTION:
+                    analysis[name] = FrozenDict(name=pantone_names[i])
+                    continue
+                data = _cached_section(rgb, name)
+                if data is not None:
+                    analysis[name] = data
+            analyses.append(FrozenDict(analysis))
+    finally:
+        _palette.batches = None
+    return analyses
+
+def analyze_color(rgb: Tuple[int, int, int], sections=COMPREHENSIVE_SECTIONS) -> Dict:
+    """Analyze one color - see analyze()"""
+    return analyze([rgb], sections)[0]
+
+def get_comprehensive_color_analysis(rgb: Tuple[int, int, int]) -> Dict:
+    """Get comprehensive color analysis combining all theories.
+
+    Results are immutable (FrozenDict, tuples) and memoized per RGB value in a
+    bounded LRU cache - see analysis_cache_info().
+    """
+    return analyze_color(rgb, COMPREHENSIVE_SECTIONS)
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE * len(ANALYSIS_SECTIONS))
+def _cached_section(rgb: Tuple[int, int, int], section: str):
+    return _freeze(ANALYSIS_SECTIONS[section](rgb))
+
+def analysis_cache_info():
+    """Hit/miss statistics of the per-color analysis cache (functools CacheInfo, one entry per color and section)"""
+    return _cached_section.cache_info()
+
+def clear_analysis_cache():
+    """Drop memoized analyses - call after changing the paint or emotion data"""
+    _cached_section.cache_clear()
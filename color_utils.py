@@ -1,25 +1,503 @@
-
-from PIL import Image
-from collections import Counter
-from pantone_data import pantone_colors, rgb_to_pantone_name
+from PIL import Image, features
+from pantone_data import rgb_to_pantone_names
+from color_spaces import srgb_to_lab, lab_to_srgb, srgb_to_oklab, oklab_to_srgb
 import numpy as np
-from sklearn.cluster import KMeans
 
-def extract_dominant_colors(image_path, num_colors=20, cluster=True):
-    img = Image.open(image_path).convert("RGB")
-    img_small = img.resize((200, 200))
-    pixels = np.array(img_small).reshape(-1, 3)
+# Above this many pixels a dense bincount over all 2^24 colors beats sorting
+DENSE_HISTOGRAM_MIN_PIXELS = 1 << 20
+
+# Weighted clustering collapses pixels into this many bits per channel
+# (32 levels -> at most 32768 bins, a few thousand on typical photos)
+HISTOGRAM_BITS = 5
+
+# Below this many distinct colors the exact histogram is clustered as is
+WEIGHTED_EXACT_MAX_COLORS = 4096
+
+# Images above this many pixels take the bounded-memory large-image path
+LARGE_IMAGE_PIXELS = 16_000_000
+
+# Working memory of the large-image path. Formats Pillow can only decode in
+# one piece (PNG, compressed TIFF, full-resolution JPEG) need the decoded
+# image on top of this; uncompressed TIFF/BMP/PPM are streamed from disk.
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Automatic palette size (num_colors='auto'): clusters are split until the
+# two halves of the next split would differ by less than this CIE76 Delta E,
+# the palette explains this share of the color variance, or the cap is hit
+AUTO_MIN_DELTA_E = 8.0
+AUTO_EXPLAINED_VARIANCE = 0.98
+AUTO_MAX_COLORS = 64
+
+# Sample side length of the coarse pass in progressive extraction
+PROGRESSIVE_COARSE_SAMPLE = 64
+
+# Approximate bytes held per pixel while a block is converted and counted
+_BYTES_PER_BLOCK_PIXEL = 32
+
+# Color spaces pixels can be clustered in: name -> (from sRGB, back to sRGB).
+# Distances in the perceptual spaces track visible differences, so fewer
+# clusters are needed for the same number of distinct colors.
+CLUSTER_SPACES = {
+    'rgb': None,
+    'lab': (srgb_to_lab, lab_to_srgb),
+    'oklab': (srgb_to_oklab, oklab_to_srgb)
+}
+
+# Uncompressed raw layouts we can read straight from disk:
+# rawmode -> (bytes per pixel, byte offsets of R, G, B)
+_RAW_LAYOUTS = {
+    'RGB': (3, (0, 1, 2)),
+    'BGR': (3, (2, 1, 0)),
+    'RGBX': (4, (0, 1, 2)),
+    'RGBA': (4, (0, 1, 2)),
+    'BGRX': (4, (2, 1, 0)),
+    'BGRA': (4, (2, 1, 0)),
+    'L': (1, (0, 0, 0))
+}
+
+def pack_rgb(pixels):
+    """Pack an (N, 3) uint8 pixel array into 24-bit integers r<<16 | g<<8 | b"""
+    pixels = np.asarray(pixels)
+    packed = pixels[:, 0].astype(np.uint32) << 16
+    packed |= pixels[:, 1].astype(np.uint32) << 8
+    packed |= pixels[:, 2]
+    return packed
+
+def unpack_rgb(packed):
+    """Inverse of pack_rgb - returns an (N, 3) uint8 array"""
+    packed = np.asarray(packed, dtype=np.uint32)
+    return np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=1).astype(np.uint8)
+
+def color_histogram(pixels, top=None):
+    """Count exact colors of an (N, 3) pixel array, most frequent first.
+
+    With top set only the top most frequent colors are returned, which avoids
+    sorting millions of unique colors on large photos.
+    """
+    packed = pack_rgb(pixels)
+    if packed.size >= DENSE_HISTOGRAM_MIN_PIXELS:
+        counts = np.bincount(packed, minlength=1 << 24)
+        values = np.flatnonzero(counts)
+        counts = counts[values]
+    else:
+        values, counts = np.unique(packed, return_counts=True)
+
+    return _most_frequent(values, counts, top)
+
+def _most_frequent(values, counts, top=None):
+    """Sort packed colors by count (descending), keeping only the top ones"""
+    counts = counts.astype(np.int64)
+    if top is not None and top < counts.size:
+        candidates = np.argpartition(-counts, top - 1)[:top]
+        # Restore ascending color order so ties stay deterministic
+        candidates.sort()
+        values, counts = values[candidates], counts[candidates]
+
+    # Stable sort keeps ties in ascending color order
+    order = np.argsort(-counts, kind='stable')
+    return unpack_rgb(values[order]), counts[order]
+
+def weighted_color_histogram(pixels, bits=HISTOGRAM_BITS):
+    """Collapse an (N, 3) pixel array into (colors, weights) for weighted clustering.
+
+    Images with few distinct colors keep their exact colors. Otherwise pixels
+    are binned into a 3D histogram with `bits` bits per channel and every
+    occupied bin is represented by the mean color of its pixels.
+    """
+    colors, counts = color_histogram(pixels)
+    if len(colors) <= WEIGHTED_EXACT_MAX_COLORS:
+        return colors.astype(np.float64), counts.astype(np.float64)
+
+    pixels = np.asarray(pixels)
+    keys = pack_rgb(pixels >> (8 - bits))
+    bins, inverse, weights = np.unique(keys, return_inverse=True, return_counts=True)
+    sums = np.stack([np.bincount(inverse, weights=pixels[:, c], minlength=len(bins))
+                     for c in range(3)], axis=1)
+    return sums / weights[:, None], weights.astype(np.float64)
+
+def _raw_tile_layout(img):
+    """(bytes per pixel, channels) if every tile is uncompressed raw data we can map"""
+    if img.mode not in ('RGB', 'RGBA', 'L') or not img.tile:
+        return None
+    layouts = set()
+    for tile in img.tile:
+        args = tile[3] if isinstance(tile[3], tuple) else (tile[3],)
+        if tile[0] != 'raw' or args[0] not in _RAW_LAYOUTS:
+            return None
+        layouts.add(args[0])
+    return _RAW_LAYOUTS[layouts.pop()] if len(layouts) == 1 else None
+
+def _iter_raw_blocks(img, image_path, max_pixels):
+    """Yield (h, w, 3) blocks of uncompressed raw tiles read directly from the file"""
+    bytes_per_pixel, channels = _raw_tile_layout(img)
+    with open(image_path, 'rb') as f:
+        for tile in img.tile:
+            x0, y0, x1, y1 = tile[1]
+            args = tile[3] if isinstance(tile[3], tuple) else (tile[3],)
+            width, height = x1 - x0, y1 - y0
+            stride = (args[1] if len(args) > 1 else 0) or width * bytes_per_pixel
+
+            # Row order doesn't matter for counting, so bottom-up data (BMP)
+            # is read in file order as well
+            f.seek(tile[2])
+            rows = max(1, max_pixels // width)
+            for start in range(0, height, rows):
+                count = min(rows, height - start)
+                block = np.fromfile(f, dtype=np.uint8, count=count * stride)
+                if block.size < count * stride:
+                    raise ValueError(f"Truncated image data in {image_path}")
+                block = block.reshape(count, stride)[:, :width * bytes_per_pixel]
+                yield block.reshape(count, width, bytes_per_pixel)[:, :, channels]
+
+def iter_pixel_blocks(image_path, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Yield an image as (h, w, 3) uint8 RGB blocks sized to the memory budget.
+
+    Uncompressed rasters (TIFF, BMP, PPM) are read block by block from disk. Other formats are
+    decoded once in their native mode and converted to RGB strip by strip, so
+    no full-size RGB copy or full-size intermediate arrays are ever created.
+    """
+    max_pixels = max(1, memory_budget // _BYTES_PER_BLOCK_PIXEL)
+    with Image.open(image_path) as img:
+        if _raw_tile_layout(img):
+            yield from _iter_raw_blocks(img, image_path, max_pixels)
+            return
+
+        img.load()
+        width, height = img.size
+        rows = max(1, max_pixels // width)
+        for top in range(0, height, rows):
+            strip = img.crop((0, top, width, min(height, top + rows))).convert("RGB")
+            yield np.asarray(strip)
+
+def load_sample(image_path, sample_size=200, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Load the (N, 3) pixel sample that colors are extracted from.
+
+    Images are resized to sample_size x sample_size; JPEGs are first decoded
+    at the smallest 1/2, 1/4 or 1/8 scale that still covers the sample. Other
+    large images are streamed in blocks and uniformly subsampled to about
+    sample_size^2 pixels.
+    """
+    with Image.open(image_path) as img:
+        # A no-op for formats without reduced-scale decoding
+        img.draft('RGB', (sample_size, sample_size))
+        if img.width * img.height <= LARGE_IMAGE_PIXELS:
+            img = img.convert("RGB")
+            return np.asarray(img.resize((sample_size, sample_size))).reshape(-1, 3)
+        total_pixels = img.width * img.height
+
+    # Every block contributes in proportion to its size - a uniform random
+    # sample without ever holding more than one block
+    rng = np.random.default_rng(0)
+    probability = min(1.0, sample_size * sample_size / total_pixels)
+    samples = []
+    for block in iter_pixel_blocks(image_path, memory_budget):
+        pixels = block.reshape(-1, 3)
+        picks = rng.integers(0, len(pixels), rng.binomial(len(pixels), probability))
+        samples.append(pixels[picks])
+    return np.concatenate(samples)
+
+def image_color_histogram(image_path, top=None, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Exact color counts over every pixel of an image, most frequent first.
+
+    Large images are counted block by block into a dense 2^24 entry table
+    (64 MB), so memory stays bounded regardless of image size.
+    """
+    with Image.open(image_path) as img:
+        if img.width * img.height <= LARGE_IMAGE_PIXELS:
+            return color_histogram(np.asarray(img.convert("RGB")).reshape(-1, 3), top=top)
+
+    counts = np.zeros(1 << 24, dtype=np.uint32)
+    for block in iter_pixel_blocks(image_path, memory_budget):
+        values, block_counts = np.unique(pack_rgb(block.reshape(-1, 3)), return_counts=True)
+        counts[values] += block_counts.astype(np.uint32)
+
+    values = np.flatnonzero(counts)
+    return _most_frequent(values, counts[values], top)
+
+def _cluster_input(pixels, weighted, space='rgb'):
+    """Samples and weights for clustering - the histogram or the raw pixels"""
+    if weighted:
+        colors, weights = weighted_color_histogram(pixels)
+    else:
+        colors, weights = np.asarray(pixels, dtype=np.float64), None
+    return _to_space(colors, space), weights
+
+def _to_space(colors, space):
+    """Convert (N, 3) sRGB colors into a clustering space"""
+    if space not in CLUSTER_SPACES:
+        raise ValueError(f"Unknown color space: {space}")
+    if CLUSTER_SPACES[space] is None:
+        return colors
+    return CLUSTER_SPACES[space][0](colors)
+
+def _from_space(centers, space):
+    """Convert cluster centers back to (unclipped) sRGB"""
+    if CLUSTER_SPACES[space] is None:
+        return centers
+    return CLUSTER_SPACES[space][1](centers)
+
+def _require_rgb(space, backend):
+    if space != 'rgb':
+        raise ValueError(f"The {backend} quantizer only clusters in RGB, not {space}")
+
+def kmeans_quantize(pixels, num_colors, weighted=False, space='rgb'):
+    """Full k-means (sklearn KMeans) on the pixels or their weighted histogram"""
+    # sklearn takes about a second to import - only load it when clustering
+    from sklearn.cluster import KMeans
+    colors, weights = _cluster_input(pixels, weighted, space)
+    kmeans = KMeans(n_clusters=min(num_colors, len(colors)), random_state=0)
+    kmeans.fit(colors, sample_weight=weights)
+    return _from_space(kmeans.cluster_centers_, space)
+
+def minibatch_kmeans_quantize(pixels, num_colors, weighted=False, space='rgb'):
+    """Mini-batch k-means - approximate but much cheaper on large samples"""
+    from sklearn.cluster import MiniBatchKMeans
+    colors, weights = _cluster_input(pixels, weighted, space)
+    kmeans = MiniBatchKMeans(n_clusters=min(num_colors, len(colors)), random_state=0,
+                             batch_size=4096, n_init=3)
+    kmeans.fit(colors, sample_weight=weights)
+    return _from_space(kmeans.cluster_centers_, space)
+
+def median_cut_quantize(pixels, num_colors, weighted=False, space='rgb'):
+    """Median cut on the exact color histogram.
+
+    Repeatedly splits the box with the largest weighted squared error along
+    its widest channel at the weighted median. Always histogram based, so
+    `weighted` has no effect.
+    """
+    colors, counts = color_histogram(pixels)
+    colors = _to_space(colors.astype(np.float64), space)
+    weights = counts.astype(np.float64)
+
+    def box_error(idx):
+        w = weights[idx]
+        mean = np.average(colors[idx], axis=0, weights=w)
+        return float(np.sum(w[:, None] * (colors[idx] - mean) ** 2))
+
+    boxes = [np.arange(len(colors))]
+    errors = [box_error(boxes[0])]
+    while len(boxes) < num_colors:
+        candidate = int(np.argmax(errors))
+        if errors[candidate] <= 0:
+            break  # Only single-color boxes left
+        idx = boxes.pop(candidate)
+        errors.pop(candidate)
+
+        box = colors[idx]
+        channel = int(np.argmax(box.max(axis=0) - box.min(axis=0)))
+        order = np.argsort(box[:, channel], kind='stable')
+        cumulative = np.cumsum(weights[idx][order])
+        split = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+        split = min(max(split, 1), len(idx) - 1)
+
+        for part in (idx[order[:split]], idx[order[split:]]):
+            boxes.append(part)
+            errors.append(box_error(part))
+
+    return _from_space(np.array([np.average(colors[idx], axis=0, weights=weights[idx]) for idx in boxes]), space)
+
+def octree_quantize(pixels, num_colors, weighted=False, space='rgb'):
+    """Octree quantization on the exact color histogram.
+
+    Uses the deepest tree level that fits into num_colors leaves, then splits
+    the most populated nodes one level further while leaves remain - the
+    same result as reducing the least populated nodes of a full octree.
+    Always histogram based, so `weighted` has no effect. The tree subdivides
+    the RGB cube, so only space='rgb' is supported.
+    """
+    _require_rgb(space, 'octree')
+    colors, counts = color_histogram(pixels)
+    channels = colors.astype(np.uint32)
+    weights = counts.astype(np.float64)
+
+    def node_keys(level):
+        shift = 8 - level
+        return ((channels[:, 0] >> shift) << (2 * level)) | ((channels[:, 1] >> shift) << level) | (channels[:, 2] >> shift)
+
+    level = 0
+    while level < 8 and len(np.unique(node_keys(level + 1))) <= num_colors:
+        level += 1
+
+    labels = node_keys(level).astype(np.int64)
+    if level < 8:
+        child_keys = node_keys(level + 1).astype(np.int64)
+        nodes, inverse = np.unique(labels, return_inverse=True)
+        node_weights = np.bincount(inverse, weights=weights)
+        children = np.unique(np.stack([inverse, child_keys], axis=1), axis=0)
+        child_counts = np.bincount(children[:, 0], minlength=len(nodes))
+
+        leaf_count = len(nodes)
+        expand = np.zeros(len(nodes), dtype=bool)
+        for node in np.argsort(-node_weights, kind='stable'):
+            if leaf_count + child_counts[node] - 1 <= num_colors:
+                expand[node] = True
+                leaf_count += child_counts[node] - 1
+        # Child keys are offset so they can't collide with parent-level keys
+        labels = np.where(expand[inverse], child_keys + (1 << 24), labels)
 
-    if cluster:
-        kmeans = KMeans(n_clusters=num_colors, random_state=0)
-        kmeans.fit(pixels)
-        colors = kmeans.cluster_centers_.astype(int)
+    _, leaves = np.unique(labels, return_inverse=True)
+    leaf_weights = np.bincount(leaves, weights=weights)
+    sums = np.stack([np.bincount(leaves, weights=weights * colors[:, c]) for c in range(3)], axis=1)
+    order = np.argsort(-leaf_weights, kind='stable')
+    return (sums / leaf_weights[:, None])[order]
+
+def pillow_quantize(pixels, num_colors, weighted=False, space='rgb'):
+    """Pillow's C quantizer - libimagequant when available, fast octree otherwise"""
+    _require_rgb(space, 'pillow')
+    img = Image.fromarray(np.ascontiguousarray(pixels, dtype=np.uint8).reshape(-1, 1, 3))
+    if features.check_feature('libimagequant'):
+        method = Image.Quantize.LIBIMAGEQUANT
+    else:
+        method = Image.Quantize.FASTOCTREE
+    quantized = img.quantize(colors=min(num_colors, 256), method=method)
+
+    palette = np.array(quantized.getpalette()[:768]).reshape(-1, 3)
+    used = sorted(quantized.getcolors(), reverse=True)  # (count, index), most used first
+    return palette[[index for _, index in used]].astype(np.float64)
+
+def _weighted_mean_and_error(colors, weights):
+    """Weighted centroid of a cluster and its weighted squared error"""
+    center = np.average(colors, axis=0, weights=weights)
+    return center, float(weights @ ((colors - center) ** 2).sum(axis=1))
+
+def _split_in_two(colors, weights, iterations=10):
+    """2-means on one cluster, seeded by cutting along its principal axis.
+
+    Returns a boolean mask of the second half (all False if it can't split).
+    """
+    centered = colors - np.average(colors, axis=0, weights=weights)
+    axis = np.linalg.eigh((centered * weights[:, None]).T @ centered)[1][:, -1]
+    half = centered @ axis > 0
+    for _ in range(iterations):
+        if half.all() or not half.any():
+            break
+        first = np.average(colors[~half], axis=0, weights=weights[~half])
+        second = np.average(colors[half], axis=0, weights=weights[half])
+        moved = ((colors - second) ** 2).sum(axis=1) < ((colors - first) ** 2).sum(axis=1)
+        if np.array_equal(moved, half):
+            break
+        half = moved
+    return half if half.any() and not half.all() else np.zeros(len(colors), dtype=bool)
+
+def _refine_centers(colors, weights, centers, iterations=5):
+    """A few Lloyd iterations over all clusters, warm-started from the given centers"""
+    for _ in range(iterations):
+        distances = (colors ** 2).sum(axis=1)[:, None] - 2 * colors @ centers.T + (centers ** 2).sum(axis=1)
+        labels = distances.argmin(axis=1)
+        totals = np.bincount(labels, weights=weights, minlength=len(centers))
+        sums = np.stack([np.bincount(labels, weights=weights * colors[:, c], minlength=len(centers))
+                         for c in range(3)], axis=1)
+        occupied = totals > 0
+        centers = centers.copy()
+        centers[occupied] = sums[occupied] / totals[occupied, None]
+    return centers, totals
+
+def bisecting_kmeans(colors, weights, num_colors, space='rgb', min_delta_e=0.0, explained_variance=1.0):
+    """Bisecting k-means on (N, 3) colors in `space` with per-color weights.
+
+    Starts from one cluster and repeatedly splits the one with the largest
+    weighted error in two, so every palette size from 1 to num_colors is
+    visited in a single pass instead of refitting per k. Splitting stops early
+    once the two halves of a split are closer than min_delta_e (CIE76) or the
+    palette explains the given share of the total variance. Centers get a
+    final warm-started Lloyd refinement and are returned most weighted first.
+    """
+    center, error = _weighted_mean_and_error(colors, weights)
+    total_error = error
+    clusters = [(np.arange(len(colors)), center, error)]
+    final = []  # Clusters that are not worth splitting
+    while clusters and len(clusters) + len(final) < num_colors:
+        if total_error <= 0 or 1 - sum(c[2] for c in clusters + final) / total_error >= explained_variance:
+            break
+        idx, center, error = clusters.pop(int(np.argmax([c[2] for c in clusters])))
+        half = _split_in_two(colors[idx], weights[idx])
+        if not half.any():
+            final.append((idx, center, error))
+            continue
+        parts = [(part,) + _weighted_mean_and_error(colors[part], weights[part])
+                 for part in (idx[~half], idx[half])]
+        if min_delta_e > 0:
+            lab = srgb_to_lab(_from_space(np.array([parts[0][1], parts[1][1]]), space))
+            if np.linalg.norm(lab[0] - lab[1]) < min_delta_e:
+                final.append((idx, center, error))
+                continue
+        clusters.extend(parts)
+
+    centers, totals = _refine_centers(colors, weights, np.array([c[1] for c in clusters + final]))
+    return centers[np.argsort(-totals, kind='stable')]
+
+def bisecting_kmeans_quantize(pixels, num_colors, weighted=False, space='rgb'):
+    """Bisecting k-means - one hierarchical pass, used for automatic palette sizes"""
+    colors, weights = _cluster_input(pixels, weighted, space)
+    if weights is None:
+        weights = np.ones(len(colors))
+    return _from_space(bisecting_kmeans(colors, weights, num_colors, space=space), space)
+
+def auto_quantize(pixels, weighted=True, space='rgb', max_colors=AUTO_MAX_COLORS,
+                  min_delta_e=AUTO_MIN_DELTA_E, explained_variance=AUTO_EXPLAINED_VARIANCE):
+    """Quantize with an automatically chosen number of colors (bisecting k-means)"""
+    colors, weights = _cluster_input(pixels, weighted, space)
+    if weights is None:
+        weights = np.ones(len(colors))
+    centers = bisecting_kmeans(colors, weights, max_colors, space=space,
+                               min_delta_e=min_delta_e, explained_variance=explained_variance)
+    return _from_space(centers, space)
+
+# Quantizer backends: name -> function(pixels, num_colors, weighted, space) -> (K, 3) RGB centers
+QUANTIZERS = {
+    'kmeans': kmeans_quantize,
+    'minibatch_kmeans': minibatch_kmeans_quantize,
+    'median_cut': median_cut_quantize,
+    'octree': octree_quantize,
+    'pillow': pillow_quantize,
+    'bisecting_kmeans': bisecting_kmeans_quantize
+}
+
+# Backends whose algorithm is tied to the RGB cube (space='rgb' only)
+RGB_ONLY_QUANTIZERS = ('octree', 'pillow')
+
+def extract_dominant_colors(image_path, num_colors=20, cluster=True, full_resolution=False,
+                            weighted=False, sample_size=200, backend='kmeans',
+                            memory_budget=DEFAULT_MEMORY_BUDGET, pantone_libraries=None, space='rgb'):
+    if cluster and backend not in QUANTIZERS:
+        raise ValueError(f"Unknown quantizer backend: {backend}")
+    if space not in CLUSTER_SPACES:
+        raise ValueError(f"Unknown color space: {space}")
+    if num_colors == 'auto' and not cluster:
+        raise ValueError("num_colors='auto' needs clustering")
+
+    # Exact counting is cheap enough to run over every pixel of the original
+    if full_resolution and not cluster:
+        colors, _ = image_color_histogram(image_path, top=num_colors, memory_budget=memory_budget)
     else:
-        counts = Counter([tuple(px) for px in pixels])
-        colors = [np.array(color) for color, _ in counts.most_common(num_colors)]
+        pixels = load_sample(image_path, sample_size, memory_budget=memory_budget)
+        if cluster:
+            # Weighted clustering scales with color diversity instead of pixel count
+            if num_colors == 'auto':
+                # Picking k needs hierarchical splits, whatever the backend
+                centers = auto_quantize(pixels, weighted=weighted, space=space)
+            else:
+                centers = QUANTIZERS[backend](pixels, num_colors, weighted=weighted, space=space)
+            colors = np.clip(np.rint(centers), 0, 255).astype(int)
+        else:
+            colors, _ = color_histogram(pixels, top=num_colors)
 
-    hex_colors = ['#{:02x}{:02x}{:02x}'.format(*color) for color in colors]
-    pantone_names = [rgb_to_pantone_name(tuple(color)) for color in colors]
     rgb_colors = [tuple(map(int, color)) for color in colors]
+    hex_colors = ['#{:02x}{:02x}{:02x}'.format(*color) for color in rgb_colors]
+    pantone_names = rgb_to_pantone_names(rgb_colors, libraries=pantone_libraries) if rgb_colors else []
 
     return hex_colors, rgb_colors, pantone_names
+
+def extract_dominant_colors_progressive(image_path, num_colors=20, cluster=True, **options):
+    """Yield (hex_colors, rgb_colors, pantone_names, is_final) - coarse first, then refined.
+
+    The coarse palette comes from a tiny thumbnail run through Pillow's C
+    quantizer (or its exact histogram when not clustering) and is ready in
+    milliseconds. The refined palette uses the full extraction settings.
+    """
+    coarse = extract_dominant_colors(image_path, num_colors=num_colors, cluster=cluster,
+                                     sample_size=PROGRESSIVE_COARSE_SAMPLE, backend='pillow',
+                                     memory_budget=options.get('memory_budget', DEFAULT_MEMORY_BUDGET),
+                                     pantone_libraries=options.get('pantone_libraries'))
+    yield coarse + (False,)
+    yield extract_dominant_colors(image_path, num_colors=num_colors, cluster=cluster, **options) + (True,)
@@ -1,8 +1,30 @@
 import json
 import csv
 import struct
+import dataclasses
 from typing import List, Tuple, Dict
 
+from color_theory import COMPREHENSIVE_SECTIONS
+
+# Analysis sections each export format reads (see color_theory.analyze) -
+# web tokens and swatches skip the psychology and oil-paint work entirely
+EXPORT_SECTIONS = {
+    'csv': ('basic', 'goethe'),
+    'json': COMPREHENSIVE_SECTIONS,
+    'ase': ('basic',),
+    'css': ('basic',),
+    'scss': ('basic',),
+    'figma': ('basic',),
+    'oil_paint_csv': ('basic', 'oil_paints'),
+    'shopping_list_csv': ()
+}
+
+def _json_default(obj):
+    """Serialize analysis values json can't handle natively (e.g. OilPaint)"""
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 class SwatchExporter:
     """Export color swatches in various professional formats"""
     
@@ -46,6 +68,28 @@ class SwatchExporter:
             print(f"Error exporting ASE: {e}")
             return False
     
+    @staticmethod
+    def export_csv(colors: List[Tuple[str, Tuple[int, int, int], str]], analyses: List[Dict], filename: str):
+        """Export basic color values with Goethe emotion as CSV"""
+        try:
+            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(["HEX", "RGB", "HSL", "CMYK", "Pantone", "Goethe_Emotion"])
+                for (hex_color, rgb_color, pantone_name), analysis in zip(colors, analyses):
+                    writer.writerow([
+                        analysis['basic']['hex'],
+                        analysis['basic']['rgb'],
+                        analysis['basic']['hsl'],
+                        analysis['basic']['cmyk'],
+                        pantone_name,
+                        analysis['goethe']['emotion']
+                    ])
+            
+            return True
+        except Exception as e:
+            print(f"Error exporting CSV: {e}")
+            return False
+    
     @staticmethod 
     def export_json(colors: List[Dict], filename: str):
         """Export comprehensive color analysis as JSON"""
@@ -74,7 +118,7 @@ class SwatchExporter:
             }
             
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+                json.dump(export_data, f, indent=2, ensure_ascii=False, default=_json_default)
             
             return True
         except Exception as e:
@@ -252,4 +296,44 @@ class SwatchExporter:
             return True
         except Exception as e:
             print(f"Error exporting oil paint palette: {e}")
-            return False 
\ No newline at end of file
+            return False 
+    
+    @staticmethod
+    def export_shopping_list(colors: List[Tuple[str, Tuple[int, int, int], str]], filename: str,
+                             tolerance: float = None):
+        """Export the minimal oil paint tube list for the palette and a recipe per color"""
+        from paint_shopping import DEFAULT_TOLERANCE, plan_shopping_list
+        
+        try:
+            plan = plan_shopping_list([rgb_color for _, rgb_color, _ in colors],
+                                      DEFAULT_TOLERANCE if tolerance is None else tolerance)
+            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                
+                # Tubes to buy
+                writer.writerow(['Ölfarbe', 'Pigment', 'Marke', 'Serie', 'Preiskategorie'])
+                for paint in plan['paints']:
+                    writer.writerow([paint.name, paint.pigment, paint.brand, str(paint.series),
+                                     paint.price_category])
+                writer.writerow([])
+                
+                # How each palette color is mixed from them
+                writer.writerow(['HEX', 'RGB', 'Pantone', 'Mischungsrezept', 'Ergebnis', 'Delta E', 'Hinweis'])
+                for (hex_color, rgb_color, pantone_name), entry in zip(colors, plan['colors']):
+                    if entry['recipe']:
+                        recipe = entry['recipe']
+                        mixing_recipe = '; '.join(f"{comp}: {ratio}" for comp, ratio
+                                                  in zip(recipe['components'], recipe['ratios']))
+                        result = '#{:02X}{:02X}{:02X}'.format(*entry['resulting_color'])
+                        note = ''
+                    else:
+                        mixing_recipe = ''
+                        result = ''
+                        note = f"Nicht erreichbar - nächste Ölfarbe: {entry['nearest_paint']}"
+                    writer.writerow([hex_color, f"RGB{tuple(rgb_color)}", pantone_name, mixing_recipe,
+                                     result, f"{entry['distance']:.1f}", note])
+            
+            return True
+        except Exception as e:
+            print(f"Error exporting shopping list: {e}")
+            return False
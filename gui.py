@@ -1,16 +1,16 @@
 
 import tkinter as tk
 from tkinter import filedialog, IntVar, Checkbutton, messagebox, font, ttk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import numpy as np
-import csv
+import importlib.util
 import threading
 import time
 from PIL import Image, ImageTk
-from color_utils import extract_dominant_colors
-from color_theory import get_comprehensive_color_analysis
-from export_utils import SwatchExporter
+import numpy as np
+from color_utils import CLUSTER_SPACES, QUANTIZERS, RGB_ONLY_QUANTIZERS
+from cache_utils import ResultCache, extract_and_analyze_progressive
+from color_theory import ColorBlindnessSimulator, analyze, analyze_color
+from color_vision import DEFICIENCIES
+from export_utils import EXPORT_SECTIONS, SwatchExporter
 import sys
 import os
 
@@ -25,12 +25,61 @@ if sys.platform == "win32":
         except:
             pass
 
+# Analysis sections a color card shows right away - the Goethe and oil
+# paint tabs are analyzed when opened
+CARD_SECTIONS = ('basic', 'itten')
+
+# Color vision simulations for the preview and palette ('normal' = none)
+VISION_MODES = ('normal',) + tuple(DEFICIENCIES)
+
+# Palette sizes offered in cluster mode
+PALETTE_SIZES = ('auto', '10', '20', '30', '50')
+
+# The loading state only appears if no palette (e.g. a cache hit) arrives sooner
+LOADING_STATE_DELAY_MS = 150
+
 stored_colors = []
 stored_comprehensive_analysis = []
 current_image_path = None
 is_processing = False
 
-def start_gui():
+def start_gui(use_cache=True, on_ready=None):
+    # Persistent result cache - re-opened images show up instantly
+    result_cache = None
+    if use_cache:
+        try:
+            result_cache = ResultCache()
+        except OSError as e:
+            print(f"Result cache not available: {e}")
+    
+    # Preview thumbnail and card swatches, kept for re-simulation
+    preview_state = {'image': None}
+    card_swatches = []
+    
+    # Oil paint analysis loads (or first builds) the mixture index, which takes
+    # seconds - it only runs in worker threads, one at a time
+    oil_paint_lock = threading.Lock()
+    
+    def run_in_background(work, done):
+        """Call work() in a worker thread and hand its result to done() on the Tk thread"""
+        def worker():
+            with oil_paint_lock:
+                try:
+                    result = work()
+                except Exception as e:
+                    print(f"Background analysis failed: {e}")
+                    result = None
+            window.after(0, lambda: done(result))
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def warm_oil_paints(rgb_colors):
+        # Memoizes the palette's oil paint sections, so opening the tab is instant
+        with oil_paint_lock:
+            try:
+                analyze(rgb_colors, ('oil_paints',))
+            except Exception as e:
+                print(f"Oil paint analysis failed: {e}")
+    
     # Toast notification system
     def show_toast(message, duration=2000):
         toast = tk.Toplevel(window)
@@ -81,35 +130,59 @@ def start_gui():
         current_image_path = file_path
         is_processing = True
         
-        # Show loading state
-        show_loading_state()
+        cluster = cluster_var.get() == 1
+        palette_size = palette_size_var.get()
+        extract_options = {
+            'num_colors': (palette_size if palette_size == 'auto' else int(palette_size)) if cluster else 1000,
+            'cluster': cluster,
+            'full_resolution': not cluster,
+            'weighted': True,
+            'sample_size': 400,
+            'backend': quantizer_var.get(),
+            'space': space_var.get()
+        }
+        
+        def show_result(result, show_preview=True):
+            global stored_colors, stored_comprehensive_analysis
+            stored_colors = list(zip(result['hex_colors'], result['rgb_colors'], result['pantone_names']))
+            stored_comprehensive_analysis = result['analysis']
+            show_colors_with_analysis(result['hex_colors'], result['rgb_colors'],
+                                      result['pantone_names'], result['analysis'])
+            if show_preview:
+                show_image_preview(file_path)
+        
+        # The worker hashes the file for the cache lookup - a hit shows up
+        # before the loading state does
+        loading_job = window.after(LOADING_STATE_DELAY_MS, show_loading_state)
+        
+        progress_shown = []
+        
+        def show_progress(result):
+            # Ignore late results of an image that is no longer shown
+            if file_path != current_image_path:
+                return
+            window.after_cancel(loading_job)
+            # The preview only needs to be drawn with the first palette
+            show_result(result, show_preview=not progress_shown)
+            progress_shown.append(result)
+            colors_header.config(text="EXTRACTED COLORS" if result['final'] else "EXTRACTED COLORS — REFINING...")
         
         def analyze_image():
             try:
-                cluster = cluster_var.get() == 1
-                hex_colors, rgb_colors, pantone_names = extract_dominant_colors(
-                    file_path, num_colors=30 if cluster else 1000, cluster=cluster
-                )
-                
-                # Store basic colors
-                global stored_colors
-                stored_colors = list(zip(hex_colors, rgb_colors, pantone_names))
-                
-                # Comprehensive analysis with Goethe & Itten
-                comprehensive_data = []
-                for rgb in rgb_colors:
-                    analysis = get_comprehensive_color_analysis(rgb)
-                    comprehensive_data.append(analysis)
-                
-                global stored_comprehensive_analysis
-                stored_comprehensive_analysis = comprehensive_data
-                
-                # Update UI in main thread
-                window.after(0, lambda: show_colors_with_analysis(hex_colors, rgb_colors, pantone_names, comprehensive_data))
-                window.after(0, lambda: show_image_preview(file_path))
+                # Coarse palette within milliseconds, refined palette afterwards
+                result = None
+                for result in extract_and_analyze_progressive(file_path, cache=result_cache,
+                                                              sections=CARD_SECTIONS, **extract_options):
+                    # Update UI in main thread
+                    window.after(0, lambda r=result: show_progress(r))
+                if result is not None:
+                    # Own thread - the first index build must not block opening the next image
+                    threading.Thread(target=warm_oil_paints, args=(result['rgb_colors'],), daemon=True).start()
                 
             except Exception as e:
-                window.after(0, lambda: messagebox.showerror("Error", f"Failed to process image: {str(e)}"))
+                window.after(0, lambda: window.after_cancel(loading_job))
+                window.after(0, lambda: colors_header.config(text="EXTRACTED COLORS"))
+                window.after(0, lambda msg=str(e): messagebox.showerror("Error", f"Failed to process image: {msg}"))
             finally:
                 global is_processing
                 is_processing = False
@@ -178,21 +251,50 @@ def start_gui():
             # Update preview in header
             img = Image.open(image_path)
             img.thumbnail((80, 80), Image.Resampling.LANCZOS)
+            preview_state['image'] = img.convert('RGB')
+            render_preview()
+                
+        except Exception as e:
+            print(f"Could not show image preview: {e}")
+    
+    def render_preview():
+        """Draw the preview - next to its color vision simulation if one is selected"""
+        # Remove old preview if exists
+        for widget in header_frame.winfo_children():
+            if hasattr(widget, '_preview_widget'):
+                widget.destroy()
+        if preview_state['image'] is None:
+            return
+        
+        images = [preview_state['image']]
+        mode = vision_var.get()
+        if mode != 'normal':
+            simulated = ColorBlindnessSimulator.simulate(np.asarray(images[0]), mode, severity_var.get())
+            images.append(Image.fromarray(simulated))
+        
+        # Packed from the right, so the simulation ends up right of the original
+        for img in reversed(images):
             photo = ImageTk.PhotoImage(img)
-            
-            # Remove old preview if exists
-            for widget in header_frame.winfo_children():
-                if hasattr(widget, '_preview_widget'):
-                    widget.destroy()
-            
-            # Create new preview label
             preview_label = tk.Label(header_frame, image=photo, bg='#FAFAFA')
             preview_label.image = photo  # Keep reference
             preview_label._preview_widget = True  # Mark for removal
-            preview_label.pack(side='right', padx=20)
-                
-        except Exception as e:
-            print(f"Could not show image preview: {e}")
+            preview_label.pack(side='right', padx=(0, 20))
+    
+    def recolor_swatches():
+        """Show the card swatches as seen with the selected color vision deficiency"""
+        if not card_swatches:
+            return
+        mode = vision_var.get()
+        colors = np.array([rgb for _, rgb in card_swatches])
+        if mode != 'normal':
+            # The whole palette in one call
+            colors = ColorBlindnessSimulator.simulate(colors, mode, severity_var.get())
+        for (canvas, _), (r, g, b) in zip(card_swatches, colors):
+            canvas.configure(bg=f'#{r:02x}{g:02x}{b:02x}')
+    
+    def on_vision_change(*_):
+        render_preview()
+        recolor_swatches()
     
     # Simplified drag and drop using tkinter events
     def setup_drag_drop():
@@ -225,6 +327,82 @@ def start_gui():
             print(f"Drag and drop not available: {e}")
             pass
 
+    def fill_goethe_tab(goethe_frame, goethe):
+        goethe_emotion = tk.Label(goethe_frame, text=f"Emotion: {goethe['emotion']}", 
+                                font=swiss_font_small, fg='#333333', bg='#FFFFFF', wraplength=180)
+        goethe_emotion.pack(fill='x', pady=2)
+        
+        goethe_character = tk.Label(goethe_frame, text=f"Character: {goethe['character']}", 
+                                  font=swiss_font_small, fg='#333333', bg='#FFFFFF', wraplength=180)
+        goethe_character.pack(fill='x', pady=2)
+        
+        goethe_effect = tk.Label(goethe_frame, text=f"Effect: {goethe['effect']}", 
+                               font=swiss_font_small, fg='#333333', bg='#FFFFFF', wraplength=180)
+        goethe_effect.pack(fill='x', pady=2)
+    
+    def fill_oil_paint_tab(oil_frame, oil_data):
+        # Closest pure paint
+        if oil_data['closest_pure_paint']:
+            paint = oil_data['closest_pure_paint']
+            
+            # Paint name and pigment
+            paint_name = tk.Label(oil_frame, text=f"🎨 {paint.name}", 
+                                font=('Segoe UI', 9, 'bold'), fg='#1A1A1A', bg='#FFFFFF')
+            paint_name.pack(fill='x', pady=(5, 2))
+            
+            pigment_label = tk.Label(oil_frame, text=f"Pigment: {paint.pigment}", 
+                                   font=swiss_font_small, fg='#666666', bg='#FFFFFF')
+            pigment_label.pack(fill='x', pady=1)
+            
+            # Properties in compact format
+            properties_text = f"⚫ {paint.opacity} • ⏱️ {paint.drying_time} • ☀️ {paint.lightfastness}/4"
+            properties_label = tk.Label(oil_frame, text=properties_text, 
+                                       font=('Segoe UI', 7), fg='#888888', bg='#FFFFFF')
+            properties_label.pack(fill='x', pady=1)
+            
+            # Brand and series
+            brand_text = f"{paint.brand} • Serie {paint.series} • {paint.price_category}"
+            brand_label = tk.Label(oil_frame, text=brand_text, 
+                                 font=('Segoe UI', 7), fg='#999999', bg='#FFFFFF')
+            brand_label.pack(fill='x', pady=(1, 5))
+            
+            # Separator
+            separator = tk.Frame(oil_frame, height=1, bg='#E0E0E0')
+            separator.pack(fill='x', pady=3)
+        
+        # Mixing suggestions (if available)
+        if oil_data['suggested_mixtures']:
+            mix_label = tk.Label(oil_frame, text="💫 Mischungsvorschläge:", 
+                               font=('Segoe UI', 8, 'bold'), fg='#1A1A1A', bg='#FFFFFF')
+            mix_label.pack(fill='x', pady=(5, 2))
+            
+            for mixture in oil_data['suggested_mixtures'][:2]:  # Show top 2
+                mix_name = tk.Label(oil_frame, text=f"• {mixture['name']}", 
+                                  font=('Segoe UI', 7, 'bold'), fg='#333333', bg='#FFFFFF')
+                mix_name.pack(fill='x', pady=1)
+                
+                # Mixing components
+                components = mixture['recipe']['components']
+                ratios = mixture['recipe']['ratios']
+                mix_recipe = " + ".join([f"{comp} ({ratio})" for comp, ratio in zip(components, ratios)])
+                
+                recipe_label = tk.Label(oil_frame, text=mix_recipe, 
+                                      font=('Segoe UI', 6), fg='#666666', bg='#FFFFFF', wraplength=170)
+                recipe_label.pack(fill='x', pady=(0, 3))
+        
+        # Quick painting tips
+        if oil_data['painting_tips']:
+            tips_label = tk.Label(oil_frame, text="💡 Maltipps:", 
+                                font=('Segoe UI', 8, 'bold'), fg='#1A1A1A', bg='#FFFFFF')
+            tips_label.pack(fill='x', pady=(5, 2))
+            
+            # Show first 2 most important tips
+            for tip in oil_data['painting_tips'][:2]:
+                tip_text = tip.replace("🎨 ", "").replace("💡 ", "").replace("⏰ ", "").replace("☀️ ", "")
+                tip_label = tk.Label(oil_frame, text=f"• {tip_text}", 
+                                    font=('Segoe UI', 6), fg='#555555', bg='#FFFFFF', wraplength=170)
+                tip_label.pack(fill='x', pady=1)
+
     def show_colors_with_analysis(hex_colors, rgb_colors, pantone_names, comprehensive_data):
         # Clear previous widgets in inner_frame
         for widget in inner_frame.winfo_children():
@@ -248,6 +426,7 @@ def start_gui():
             # Clear and recreate grid
             for widget in inner_frame.winfo_children():
                 widget.destroy()
+            card_swatches.clear()
             
             # Create comprehensive color cards with all analysis
             for i, (hex_color, rgb_color, pantone_name, analysis) in enumerate(zip(hex_colors, rgb_colors, pantone_names, comprehensive_data)):
@@ -291,6 +470,7 @@ def start_gui():
                                             bg=hex_color, highlightthickness=0,
                                             relief='flat', bd=0)
                 main_color_canvas.pack()
+                card_swatches.append((main_color_canvas, rgb_color))
                 
                 # Color harmony preview (centered under main color)
                 harmony_frame = tk.Frame(color_frame, bg='#FFFFFF')
@@ -373,94 +553,31 @@ def start_gui():
                     
                     make_selectable(entry)
                 
-                # Goethe analysis tab
+                # Goethe and oil paint tabs are analyzed when first opened
                 goethe_frame = tk.Frame(notebook, bg='#FFFFFF')
                 notebook.add(goethe_frame, text='Goethe')
-                
-                goethe_emotion = tk.Label(goethe_frame, text=f"Emotion: {analysis['goethe']['emotion']}", 
-                                        font=swiss_font_small, fg='#333333', bg='#FFFFFF', wraplength=180)
-                goethe_emotion.pack(fill='x', pady=2)
-                
-                goethe_character = tk.Label(goethe_frame, text=f"Character: {analysis['goethe']['character']}", 
-                                          font=swiss_font_small, fg='#333333', bg='#FFFFFF', wraplength=180)
-                goethe_character.pack(fill='x', pady=2)
-                
-                goethe_effect = tk.Label(goethe_frame, text=f"Effect: {analysis['goethe']['effect']}", 
-                                       font=swiss_font_small, fg='#333333', bg='#FFFFFF', wraplength=180)
-                goethe_effect.pack(fill='x', pady=2)
-                
-                # Oil Paint analysis tab (if available)
-                if 'oil_paints' in analysis:
-                    oil_frame = tk.Frame(notebook, bg='#FFFFFF')
-                    notebook.add(oil_frame, text='Ölfarben')
-                    
-                    oil_data = analysis['oil_paints']
-                    
-                    # Closest pure paint
-                    if oil_data['closest_pure_paint']:
-                        paint = oil_data['closest_pure_paint']
-                        
-                        # Paint name and pigment
-                        paint_name = tk.Label(oil_frame, text=f"🎨 {paint.name}", 
-                                            font=('Segoe UI', 9, 'bold'), fg='#1A1A1A', bg='#FFFFFF')
-                        paint_name.pack(fill='x', pady=(5, 2))
-                        
-                        pigment_label = tk.Label(oil_frame, text=f"Pigment: {paint.pigment}", 
-                                               font=swiss_font_small, fg='#666666', bg='#FFFFFF')
-                        pigment_label.pack(fill='x', pady=1)
-                        
-                        # Properties in compact format
-                        properties_text = f"⚫ {paint.opacity} • ⏱️ {paint.drying_time} • ☀️ {paint.lightfastness}/4"
-                        properties_label = tk.Label(oil_frame, text=properties_text, 
-                                                   font=('Segoe UI', 7), fg='#888888', bg='#FFFFFF')
-                        properties_label.pack(fill='x', pady=1)
-                        
-                        # Brand and series
-                        brand_text = f"{paint.brand} • Serie {paint.series} • {paint.price_category}"
-                        brand_label = tk.Label(oil_frame, text=brand_text, 
-                                             font=('Segoe UI', 7), fg='#999999', bg='#FFFFFF')
-                        brand_label.pack(fill='x', pady=(1, 5))
-                        
-                        # Separator
-                        separator = tk.Frame(oil_frame, height=1, bg='#E0E0E0')
-                        separator.pack(fill='x', pady=3)
-                    
-                    # Mixing suggestions (if available)
-                    if oil_data['suggested_mixtures']:
-                        mix_label = tk.Label(oil_frame, text="💫 Mischungsvorschläge:", 
-                                           font=('Segoe UI', 8, 'bold'), fg='#1A1A1A', bg='#FFFFFF')
-                        mix_label.pack(fill='x', pady=(5, 2))
-                        
-                        for mixture in oil_data['suggested_mixtures'][:2]:  # Show top 2
-                            mix_name = tk.Label(oil_frame, text=f"• {mixture['name']}", 
-                                              font=('Segoe UI', 7, 'bold'), fg='#333333', bg='#FFFFFF')
-                            mix_name.pack(fill='x', pady=1)
-                            
-                            # Mixing components
-                            components = mixture['recipe']['components']
-                            ratios = mixture['recipe']['ratios']
-                            mix_recipe = " + ".join([f"{comp} ({ratio})" for comp, ratio in zip(components, ratios)])
-                            
-                            recipe_label = tk.Label(oil_frame, text=mix_recipe, 
-                                                  font=('Segoe UI', 6), fg='#666666', bg='#FFFFFF', wraplength=170)
-                            recipe_label.pack(fill='x', pady=(0, 3))
-                    
-                    # Quick painting tips
-                    if oil_data['painting_tips']:
-                        tips_label = tk.Label(oil_frame, text="💡 Maltipps:", 
-                                            font=('Segoe UI', 8, 'bold'), fg='#1A1A1A', bg='#FFFFFF')
-                        tips_label.pack(fill='x', pady=(5, 2))
-                        
-                        # Show first 2 most important tips
-                        for tip in oil_data['painting_tips'][:2]:
-                            tip_text = tip.replace("🎨 ", "").replace("💡 ", "").replace("⏰ ", "").replace("☀️ ", "")
-                            tip_label = tk.Label(oil_frame, text=f"• {tip_text}", 
-                                                font=('Segoe UI', 6), fg='#555555', bg='#FFFFFF', wraplength=170)
-                            tip_label.pack(fill='x', pady=1)
-                
-
-                
-
+                oil_frame = tk.Frame(notebook, bg='#FFFFFF')
+                notebook.add(oil_frame, text='Ölfarben')
+                
+                filled_tabs = set()
+                
+                def on_tab_changed(event, rgb=rgb_color, goethe_frame=goethe_frame, oil_frame=oil_frame,
+                                   filled=filled_tabs):
+                    tab = event.widget.nametowidget(event.widget.select())
+                    if tab in filled:
+                        return
+                    filled.add(tab)
+                    if tab is goethe_frame:
+                        fill_goethe_tab(goethe_frame, analyze_color(rgb, ('goethe',))['goethe'])
+                    elif tab is oil_frame:
+                        def show_oil_paints(oil_analysis):
+                            if oil_analysis and 'oil_paints' in oil_analysis and oil_frame.winfo_exists():
+                                fill_oil_paint_tab(oil_frame, oil_analysis['oil_paints'])
+                        run_in_background(lambda: analyze_color(rgb, ('oil_paints',)), show_oil_paints)
+                
+                notebook.bind('<<NotebookTabChanged>>', on_tab_changed)
+            
+            recolor_swatches()
             
             # Configure grid weights for responsive behavior
             for i in range(current_cols):
@@ -507,8 +624,8 @@ def start_gui():
         
         export_var = tk.StringVar(value="csv")
         
-        # Check if oil paint data is available
-        has_oil_paints = any('oil_paints' in analysis for analysis in stored_comprehensive_analysis) if stored_comprehensive_analysis else False
+        # Check if oil paint data is available (without loading it on the Tk thread)
+        has_oil_paints = importlib.util.find_spec('oil_paint_data') is not None
         
         formats = [
             ("CSV - Basic colors", "csv"),
@@ -522,6 +639,7 @@ def start_gui():
         # Add oil paint export option if data is available
         if has_oil_paints:
             formats.append(("Ölfarben-Palette (CSV)", "oil_paint_csv"))
+            formats.append(("Ölfarben-Einkaufsliste (CSV)", "shopping_list_csv"))
         
         for text, value in formats:
             tk.Radiobutton(export_window, text=text, variable=export_var, value=value,
@@ -537,7 +655,8 @@ def start_gui():
                 "css": [("CSS files", "*.css")],
                 "scss": [("SCSS files", "*.scss")],
                 "figma": [("JSON files", "*.json")],
-                "oil_paint_csv": [("CSV files", "*.csv")]
+                "oil_paint_csv": [("CSV files", "*.csv")],
+                "shopping_list_csv": [("CSV files", "*.csv")]
             }
             
             file_path = filedialog.asksaveasfilename(
@@ -545,50 +664,43 @@ def start_gui():
                 filetypes=file_types[format_type]
             )
             
-            if file_path:
-                success = False
+            if not file_path:
+                return
+            colors = list(stored_colors)
+            
+            def write_export():
+                # Only the sections this format reads (memoized from the cards where possible)
+                analyses = analyze([rgb for _, rgb, _ in colors], EXPORT_SECTIONS[format_type])
                 
                 if format_type == "csv":
-                    # Basic CSV export
-                    with open(file_path, "w", newline="", encoding='utf-8') as csvfile:
-                        writer = csv.writer(csvfile)
-                        writer.writerow(["HEX", "RGB", "HSL", "CMYK", "Pantone", "Goethe_Emotion"])
-                        for i, (hex_val, rgb, pantone) in enumerate(stored_colors):
-                            analysis = stored_comprehensive_analysis[i]
-                            writer.writerow([
-                                analysis['basic']['hex'],
-                                analysis['basic']['rgb'],
-                                analysis['basic']['hsl'],
-                                analysis['basic']['cmyk'],
-                                pantone,
-                                analysis['goethe']['emotion']
-                            ])
-                    success = True
-                    
+                    return SwatchExporter.export_csv(colors, analyses, file_path)
                 elif format_type == "json":
-                    success = SwatchExporter.export_json(stored_comprehensive_analysis, file_path)
-                    
+                    return SwatchExporter.export_json(analyses, file_path)
                 elif format_type == "ase":
-                    success = SwatchExporter.export_adobe_ase(stored_colors, file_path)
-                    
+                    return SwatchExporter.export_adobe_ase(colors, file_path)
                 elif format_type == "css":
-                    success = SwatchExporter.export_css_variables(stored_colors, file_path)
-                    
+                    return SwatchExporter.export_css_variables(colors, file_path)
                 elif format_type == "scss":
-                    success = SwatchExporter.export_scss_variables(stored_colors, file_path)
-                    
+                    return SwatchExporter.export_scss_variables(colors, file_path)
                 elif format_type == "figma":
-                    success = SwatchExporter.export_figma_tokens(stored_colors, file_path)
-                    
+                    return SwatchExporter.export_figma_tokens(colors, file_path)
                 elif format_type == "oil_paint_csv":
-                    success = SwatchExporter.export_oil_paint_palette(stored_comprehensive_analysis, file_path)
-                
+                    return SwatchExporter.export_oil_paint_palette(analyses, file_path)
+                elif format_type == "shopping_list_csv":
+                    return SwatchExporter.export_shopping_list(colors, file_path)
+                return False
+            
+            def export_finished(success):
                 if success:
                     messagebox.showinfo("Export Successful", f"File saved: {file_path}")
-                    export_window.destroy()
+                    if export_window.winfo_exists():
+                        export_window.destroy()
                 else:
                     messagebox.showerror("Export Failed", "Could not export file.")
-        
+            
+            # JSON and oil paint formats may load the mixture index - write in a worker
+            run_in_background(write_export, export_finished)
+    
         tk.Button(export_window, text="EXPORT", command=do_export,
                  font=swiss_font_medium, bg='#1A1A1A', fg='#FFFFFF', 
                  relief='flat', bd=0, padx=25, pady=12).pack(pady=20)
@@ -735,6 +847,68 @@ Each color card shows small previews of harmonies:
                                activebackground='#FFFFFF', activeforeground='#1A1A1A')
     cluster_check.pack(side='left', padx=(0, 30))
     
+    # Palette size in cluster mode - 'auto' picks it per image
+    palette_size_var = tk.StringVar(value='30')
+    palette_size_label = tk.Label(inner_control, text="Colors", font=swiss_font_small,
+                                 bg='#FFFFFF', fg='#666666')
+    palette_size_label.pack(side='left', padx=(0, 8))
+    palette_size_menu = tk.OptionMenu(inner_control, palette_size_var, *PALETTE_SIZES)
+    palette_size_menu.configure(font=swiss_font_small, bg='#FFFFFF', fg='#1A1A1A',
+                                relief='flat', bd=0, highlightthickness=1,
+                                highlightbackground='#E0E0E0', activebackground='#F0F0F0')
+    palette_size_menu.pack(side='left', padx=(0, 30))
+    
+    # Quantizer backend used when extracting dominant colors
+    quantizer_var = tk.StringVar(value='kmeans')
+    quantizer_label = tk.Label(inner_control, text="Quantizer", font=swiss_font_small,
+                              bg='#FFFFFF', fg='#666666')
+    quantizer_label.pack(side='left', padx=(0, 8))
+    quantizer_menu = tk.OptionMenu(inner_control, quantizer_var, *QUANTIZERS)
+    quantizer_menu.configure(font=swiss_font_small, bg='#FFFFFF', fg='#1A1A1A',
+                             relief='flat', bd=0, highlightthickness=1,
+                             highlightbackground='#E0E0E0', activebackground='#F0F0F0')
+    quantizer_menu.pack(side='left', padx=(0, 30))
+    
+    # Color space the quantizer clusters in (octree/pillow are RGB only)
+    space_var = tk.StringVar(value='rgb')
+    space_label = tk.Label(inner_control, text="Space", font=swiss_font_small,
+                          bg='#FFFFFF', fg='#666666')
+    space_label.pack(side='left', padx=(0, 8))
+    space_menu = tk.OptionMenu(inner_control, space_var, *CLUSTER_SPACES)
+    space_menu.configure(font=swiss_font_small, bg='#FFFFFF', fg='#1A1A1A',
+                         relief='flat', bd=0, highlightthickness=1,
+                         highlightbackground='#E0E0E0', activebackground='#F0F0F0')
+    space_menu.pack(side='left', padx=(0, 30))
+    
+    def update_space_menu(*_):
+        # Only offer the spaces the selected quantizer can cluster in
+        rgb_only = quantizer_var.get() in RGB_ONLY_QUANTIZERS
+        if rgb_only and space_var.get() != 'rgb':
+            space_var.set('rgb')
+        menu = space_menu['menu']
+        for i, space in enumerate(CLUSTER_SPACES):
+            menu.entryconfigure(i, state='disabled' if rgb_only and space != 'rgb' else 'normal')
+    
+    quantizer_var.trace_add('write', update_space_menu)
+    
+    # Color vision simulation of the preview and palette
+    vision_var = tk.StringVar(value='normal')
+    vision_label = tk.Label(inner_control, text="Vision", font=swiss_font_small,
+                           bg='#FFFFFF', fg='#666666')
+    vision_label.pack(side='left', padx=(0, 8))
+    vision_menu = tk.OptionMenu(inner_control, vision_var, *VISION_MODES, command=on_vision_change)
+    vision_menu.configure(font=swiss_font_small, bg='#FFFFFF', fg='#1A1A1A',
+                          relief='flat', bd=0, highlightthickness=1,
+                          highlightbackground='#E0E0E0', activebackground='#F0F0F0')
+    vision_menu.pack(side='left', padx=(0, 8))
+    
+    # Severity of the -anomaly simulations
+    severity_var = tk.DoubleVar(value=0.6)
+    severity_scale = tk.Scale(inner_control, variable=severity_var, from_=0.1, to=1.0,
+                              resolution=0.1, orient='horizontal', length=90, showvalue=False,
+                              bg='#FFFFFF', highlightthickness=0, bd=0, command=on_vision_change)
+    severity_scale.pack(side='left', padx=(0, 30))
+    
     export_btn = tk.Button(button_frame, text="EXPORT", command=export_colors,
                           font=swiss_font_medium, bg='#FFFFFF', fg='#1A1A1A', 
                           relief='solid', bd=1, padx=25, pady=12,
@@ -816,5 +990,9 @@ Each color card shows small previews of harmonies:
     
     # Show initial drop zone
     show_drop_zone()
+    
+    # Startup profiling hook - runs once the window is up and idle
+    if on_ready:
+        window.after_idle(lambda: on_ready(window))
 
     window.mainloop()
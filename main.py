@@ -1,4 +1,55 @@
-from gui import start_gui
+import sys
+import time
+
+_START = time.perf_counter()
+
+# Library modules in dependency order - profiled one after another, so each
+# timing is the extra cost of importing that module
+STARTUP_MODULES = ('pantone_data', 'color_theory', 'color_utils', 'cache_utils', 'gui')
+
+# Heavy dependencies that must stay out of startup (loaded on first use)
+DEFERRED_MODULES = ('sklearn', 'scipy', 'matplotlib')
+
+def profile_startup():
+    """Print import costs and time to an interactive window, then exit"""
+    import importlib
+
+    for name in STARTUP_MODULES:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        print(f"import {name:<14} {1000 * (time.perf_counter() - start):7.1f} ms")
+
+    loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+    if loaded:
+        print(f"WARNING: loaded at startup: {', '.join(loaded)}")
+
+    def on_ready(window):
+        print(f"window ready       {1000 * (time.perf_counter() - _START):7.1f} ms")
+        window.destroy()
+
+    from gui import start_gui
+    try:
+        start_gui(on_ready=on_ready)
+    except Exception as e:
+        # Import timings are still useful without a display
+        print(f"window not available: {e}")
+    return 1 if loaded else 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv and argv[0] == 'batch':
+        from batch_utils import main as batch_main
+        return batch_main(argv[1:])
+    if argv and argv[0] == 'benchmark':
+        from benchmark import main as benchmark_main
+        return benchmark_main(argv[1:])
+    if '--profile-startup' in argv:
+        return profile_startup()
+
+    from gui import start_gui
+    start_gui(use_cache='--no-cache' not in argv)
+    return 0
 
 if __name__ == '__main__':
-    start_gui()
+    sys.exit(main())
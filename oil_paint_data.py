@@ -3,13 +3,12 @@
 Pigment-basierte Farbmischungen und professionelle Malfarben-Informationen
 """
 
-import math
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(frozen=True)
 class OilPaint:
-    """Repräsentiert eine spezifische Ölfarbe"""
+    """Repräsentiert eine spezifische Ölfarbe (unveränderlich - wird in Analysen geteilt)"""
     name: str
     pigment: str
     rgb: Tuple[int, int, int]
@@ -20,17 +19,23 @@ class OilPaint:
     brand: str
     series: int  # Paint series number
     mixing_ratio: Optional[str] = None  # Für Mischungen
+    # Kubelka-Munk-Daten für paint_mixing: Absorption K je 10-nm-Band 380-730 nm
+    # und relative Streuung S (None = aus rgb abgeleitet bzw. 1.0)
+    absorption: Optional[Tuple[float, ...]] = None
+    scattering: Optional[float] = None
 
 # Grundfarben-Palette - Traditionelle Künstlerpigmente
 BASIC_OIL_PAINTS = {
     # Weiß
     (255, 255, 255): OilPaint(
         "Titanweiß", "PW6", (255, 255, 255), 
-        "opaque", "medium", 4, "artist", "Schmincke", 1
+        "opaque", "medium", 4, "artist", "Schmincke", 1,
+        scattering=4.0  # Titandioxid streut sehr stark - hellt kräftig auf
     ),
     (252, 252, 250): OilPaint(
         "Zinkweiß", "PW4", (252, 252, 250), 
-        "semi-opaque", "slow", 4, "artist", "Schmincke", 1
+        "semi-opaque", "slow", 4, "artist", "Schmincke", 1,
+        scattering=2.0
     ),
     
     # Schwarz
@@ -213,67 +218,296 @@ MIXING_RECIPES = {
     }
 }
 
+def pigment_codes(pigment: str) -> List[str]:
+    """Einzelne Colour-Index-Codes einer Pigmentangabe ("PB15+PBk6" -> ["PB15", "PBk6"])"""
+    return [code.strip() for code in pigment.split("+") if code.strip()]
+
+class PaintCatalogue:
+    """
+    Kompilierter Ölfarben-Katalog - einmal aufgebaut, danach nur noch Nachschlagen.
+    Hält die Farben als zusammenhängende RGB/Lab-Matrix, Indizes nach Name und
+    Pigmentcode sowie Komponenten, Anteile und Mischfarben aller Rezepte als Arrays.
+    """
+
+    def __init__(self, paints: List[OilPaint], recipes: Optional[Dict] = None):
+        # Der Abgleich braucht numpy - erst beim ersten Aufbau laden
+        import numpy as np
+        from color_matching import LabMatcher
+        from color_spaces import srgb_to_lab
+        from paint_mixing import PaintOptics
+
+        self.paints = list(paints)
+        # Gleichnamige Farben verschiedener Marken: die erste gewinnt
+        self.positions: Dict[str, int] = {}
+        for i, paint in enumerate(self.paints):
+            self.positions.setdefault(paint.name, i)
+        self.pigment_positions: Dict[str, List[int]] = {}
+        for i, paint in enumerate(self.paints):
+            for code in pigment_codes(paint.pigment):
+                self.pigment_positions.setdefault(code, []).append(i)
+
+        self.rgb = np.array([paint.rgb for paint in self.paints], dtype=np.uint8).reshape(-1, 3)
+        self.paint_matcher = LabMatcher.from_rgb(self.rgb)
+        self.lab = self.paint_matcher.lab
+
+        # Rezepte als Zeilen: Farbindizes (-1 = leer) und normierte Volumenanteile.
+        # Rezepte mit Komponenten außerhalb der Auswahl entfallen ganz - ohne sie
+        # wäre die Mischfarbe eine andere als der Name verspricht
+        self.recipe_names: List[str] = []
+        self.recipes: List[Dict] = []
+        rows = []
+        for name, recipe in (MIXING_RECIPES if recipes is None else recipes).items():
+            if len(recipe["components"]) < 2 or not all(c in self.positions for c in recipe["components"]):
+                continue
+            used = [(self.positions[component], ratio)
+                    for component, ratio in zip(recipe["components"], recipe["ratios"])]
+            self.recipe_names.append(name)
+            self.recipes.append(recipe)
+            rows.append(used)
+        width = max((len(row) for row in rows), default=1)
+        self.recipe_components = np.full((len(rows), width), -1, dtype=np.int32)
+        self.recipe_weights = np.zeros((len(rows), width))
+        for i, row in enumerate(rows):
+            total = sum(ratio for _, ratio in row)
+            self.recipe_components[i, :len(row)] = [position for position, _ in row]
+            self.recipe_weights[i, :len(row)] = [ratio / total for _, ratio in row]
+        self.recipe_rgb = np.zeros((len(rows), 3), dtype=np.uint8)
+        if rows:
+            # Optik nur für die Rezeptfarben - große Kataloge bleiben schnell aufgebaut.
+            # Leere Plätze tragen Anteil 0 und ändern die Kubelka-Munk-Mischung nicht
+            used_positions = np.unique(self.recipe_components[self.recipe_components >= 0])
+            optics = PaintOptics([self.paints[i] for i in used_positions])
+            local = np.searchsorted(used_positions, self.recipe_components)
+            mixed = optics.mix(local, self.recipe_weights[:, None, :])[:, 0]
+            self.recipe_rgb[:] = np.clip(np.rint(mixed), 0, 255)
+        self.recipe_lab = srgb_to_lab(self.recipe_rgb)
+
+        self.lookup_tables = {}
+        self.mixture_index = None
+
+    def __len__(self) -> int:
+        return len(self.paints)
+
+    def paint(self, name: str) -> Optional[OilPaint]:
+        """Farbe nach Namen (None wenn unbekannt)"""
+        position = self.positions.get(name)
+        return None if position is None else self.paints[position]
+
+    def paints_with_pigment(self, code: str) -> List[OilPaint]:
+        """Alle Farben, die das Pigment enthalten - auch als Teil einer Mischung (PB15 in PB15+PBk6)"""
+        return [self.paints[i] for i in self.pigment_positions.get(code, [])]
+
+    def recipe(self, index: int, distance: Optional[float] = None) -> Dict:
+        """Kuratiertes Rezept als Mischungsvorschlag"""
+        suggestion = {
+            "name": self.recipe_names[index],
+            "recipe": self.recipes[index],
+            "resulting_color": tuple(int(c) for c in self.recipe_rgb[index])
+        }
+        if distance is not None:
+            suggestion["distance"] = float(distance)
+        return suggestion
+
+    def lookup_table(self, bits: int = 6):
+        """RGB-Lookup-Tabelle der nächsten Grundfarbe (einmalig gebaut bzw. geladen)"""
+        from color_matching import get_lookup_table
+
+        if bits not in self.lookup_tables:
+            self.lookup_tables[bits] = get_lookup_table(self.paint_matcher, bits=bits, name='oil_paints')
+        return self.lookup_tables[bits]
+
+    def get_mixture_index(self):
+        """
+        Index aller 2er- und 3er-Mischungen (einmalig gebaut, auf Platte gecacht).
+        None bei mehr als MAX_INDEXED_PAINTS Farben - dann vorher filtern.
+        """
+        from paint_mixing import MAX_INDEXED_PAINTS, get_mixture_index
+
+        if self.mixture_index is None and len(self.paints) <= MAX_INDEXED_PAINTS:
+            self.mixture_index = get_mixture_index(self.paints)
+        return self.mixture_index
+
+_oil_paint_catalogue = None
+_paint_table = None
+_paint_filters: Dict = {}
+
+def get_paint_table():
+    """Spaltenspeicher aller Farben: Grundfarben plus alle gefundenen Herstellerkataloge"""
+    global _paint_table
+    if _paint_table is None:
+        from paint_catalogues import load_paint_table
+        _paint_table = load_paint_table(BASIC_OIL_PAINTS.values())
+    return _paint_table
+
+def select_oil_paints(brands: Optional[List[str]] = None, series: Optional[List[int]] = None,
+                      min_lightfastness: Optional[int] = None, price_categories: Optional[List[str]] = None,
+                      opacities: Optional[List[str]] = None):
+    """
+    Schränkt die Farben ein, gegen die abgeglichen wird (ohne Argumente: alle).
+    Wirft ValueError, wenn keine Farbe die Filter erfüllt.
+    """
+    global _paint_filters, _oil_paint_catalogue
+    filters = {name: value for name, value in (("brands", brands), ("series", series),
+                                               ("min_lightfastness", min_lightfastness),
+                                               ("price_categories", price_categories),
+                                               ("opacities", opacities)) if value is not None}
+    if not len(get_paint_table().select(**filters)):
+        raise ValueError(f"Keine Ölfarbe erfüllt die Filter: {filters}")
+    _paint_filters = filters
+    _oil_paint_catalogue = None
+    from color_theory import clear_analysis_cache
+    clear_analysis_cache()
+
+def selected_oil_paints() -> List[OilPaint]:
+    """Die Farben der aktuellen Auswahl (siehe select_oil_paints)"""
+    table = get_paint_table()
+    return table.paints(table.select(**_paint_filters))
+
+def oil_paints_fingerprint() -> str:
+    """Kennung der Farbauswahl für Cache-Schlüssel - ändert sich mit Filtern und Katalogdateien"""
+    from paint_catalogues import catalogue_files_fingerprint
+    return f"{sorted(_paint_filters.items())}|{catalogue_files_fingerprint()}"
+
+def get_oil_paint_catalogue() -> PaintCatalogue:
+    """Kompilierter Katalog der ausgewählten Farben und Rezepte (beim ersten Zugriff aufgebaut)"""
+    global _oil_paint_catalogue
+    if _oil_paint_catalogue is None:
+        _oil_paint_catalogue = PaintCatalogue(selected_oil_paints(), MIXING_RECIPES)
+    return _oil_paint_catalogue
+
+def invalidate_oil_paint_index():
+    """
+    Verwirft Katalog und Spaltenspeicher - nach Änderungen an BASIC_OIL_PAINTS,
+    MIXING_RECIPES oder den Katalogdateien aufrufen
+    """
+    global _oil_paint_catalogue, _paint_table
+    _oil_paint_catalogue = None
+    _paint_table = None
+    # Gemerkte Farbanalysen enthalten alte Treffer
+    from color_theory import clear_analysis_cache
+    clear_analysis_cache()
+
+def get_paint_by_name(name: str) -> Optional[OilPaint]:
+    """Ölfarbe nach Namen nachschlagen"""
+    return get_oil_paint_catalogue().paint(name)
+
+def get_paints_by_pigment(code: str) -> List[OilPaint]:
+    """Ölfarben mit einem bestimmten Pigment (Colour-Index-Code, z.B. "PR108")"""
+    return get_oil_paint_catalogue().paints_with_pigment(code)
+
+def match_image_to_oil_paints(pixels, lookup_bits: int = 6):
+    """
+    Ordnet jedem Pixel eines (H, W, 3)-Bildes die nächste Grundfarbe zu.
+    Nutzt die vorberechnete Lookup-Tabelle - liefert (Index-Array, Farbliste).
+    """
+    catalogue = get_oil_paint_catalogue()
+    return catalogue.lookup_table(lookup_bits).lookup_image(pixels), catalogue.paints
+
+def get_oil_paint_mixture_index():
+    """Index aller 2er- und 3er-Mischungen der ausgewählten Farben (None bei zu vielen Farben)"""
+    return get_oil_paint_catalogue().get_mixture_index()
+
+def find_mixing_recipes(rgb: Tuple[int, int, int], count: int = 3) -> List[Dict]:
+    """
+    Inverse Mischungssuche: die `count` Rezepte aus zwei oder drei Farben der
+    Auswahl (ganzzahlige Anteile bis 8), deren Mischfarbe dem Ziel am nächsten kommt.
+    """
+    index = get_oil_paint_mixture_index()
+    if index is None:
+        return []
+    indices, distances = index.query([rgb], count=count)
+    return [index.recipe(i, distance) for i, distance in zip(indices[0], distances[0])]
+
+class OilPaintMatches:
+    """
+    Ölfarben-Abgleich einer ganzen Palette als Arrays (siehe match_oil_paints):
+    paint_indices/distances (N,) - nächste Farbe im Katalog, recipe_distances
+    (N, R) - Abstand zu jedem kuratierten Rezept, mixture_indices/mixture_distances
+    (N, k) - beste berechnete Mischungen (k = 0 ohne Mischungsindex).
+    Tipps und beschreibende Dicts entstehen erst mit match(i) für eine Farbe.
+    """
+
+    def __init__(self, catalogue: PaintCatalogue, rgb, paint_indices, distances, recipe_distances,
+                 mixture_index=None, mixture_indices=None, mixture_distances=None):
+        self.catalogue = catalogue
+        self.rgb = rgb
+        self.paint_indices = paint_indices
+        self.distances = distances
+        self.recipe_distances = recipe_distances
+        self.mixture_index = mixture_index
+        self.mixture_indices = mixture_indices
+        self.mixture_distances = mixture_distances
+
+    def __len__(self) -> int:
+        return len(self.rgb)
+
+    def closest_paint(self, i: int) -> OilPaint:
+        return self.catalogue.paints[self.paint_indices[i]]
+
+    def suggested_mixtures(self, i: int, count: int = 3) -> List[Dict]:
+        """Kuratierte Rezepte in der Toleranz plus berechnete Mischungen, die genauesten zuerst"""
+        import numpy as np
+
+        # Kuratierte Rezepte mit höchstens 20% mehr Abstand als die beste reine Farbe
+        close = np.flatnonzero(self.recipe_distances[i] < self.distances[i] * 1.2)
+        suggestions = [self.catalogue.recipe(j, self.recipe_distances[i, j]) for j in close]
+        if self.mixture_index is not None:
+            suggestions.extend(self.mixture_index.recipe(j, distance)
+                               for j, distance in zip(self.mixture_indices[i], self.mixture_distances[i]))
+        suggestions.sort(key=lambda x: x["distance"])
+        return suggestions[:count]
+
+    def match(self, i: int) -> Dict:
+        """Vollständiges Ergebnis für Farbe i - wie rgb_to_oil_paint_match"""
+        rgb = tuple(int(c) for c in self.rgb[i])
+        closest_paint = self.closest_paint(i)
+        return {
+            "closest_pure_paint": closest_paint,
+            "distance": float(self.distances[i]),
+            "suggested_mixtures": self.suggested_mixtures(i),  # Top 3 Vorschläge
+            "painting_tips": get_painting_tips(rgb, closest_paint),
+            "color_properties": analyze_oil_paint_properties(rgb)
+        }
+
+    __getitem__ = match
+
+def match_oil_paints(rgb_array, mixture_count: int = 3) -> OilPaintMatches:
+    """
+    Gleicht N Farben in einem Schritt mit den ausgewählten Ölfarben ab - nächste
+    reine Farbe, Abstände zu allen Rezepten und die mixture_count besten
+    berechneten Mischungen, jeweils als Arrays. Distanzen sind CIEDE2000 (Delta E).
+    """
+    import numpy as np
+    from color_matching import delta_e_2000
+    from color_spaces import srgb_to_lab
+
+    catalogue = get_oil_paint_catalogue()
+    rgb = np.asarray(rgb_array).reshape(-1, 3)
+    lab = srgb_to_lab(rgb)
+
+    # Direkte Farbübereinstimmung und alle Rezepte - je eine vektorisierte Suche
+    paint_indices, distances = catalogue.paint_matcher.query(lab)
+    recipe_distances = delta_e_2000(catalogue.recipe_lab[None, :, :], lab[:, None, :])
+
+    # Berechnete Rezepte aus allen 2er- und 3er-Mischungen der Auswahl
+    mixture_index = catalogue.get_mixture_index() if mixture_count > 0 else None
+    if mixture_index is not None and len(rgb):
+        mixture_indices, mixture_distances = mixture_index.query(rgb, count=mixture_count)
+    else:
+        mixture_index = None
+        mixture_indices = np.zeros((len(rgb), 0), dtype=np.intp)
+        mixture_distances = np.zeros((len(rgb), 0))
+    return OilPaintMatches(catalogue, rgb, paint_indices, distances, recipe_distances,
+                           mixture_index, mixture_indices, mixture_distances)
+
 def rgb_to_oil_paint_match(rgb: Tuple[int, int, int]) -> Dict:
     """
     Findet die beste Ölfarben-Entsprechung für einen RGB-Wert
-    und schlägt Mischungsalternativen vor
+    und schlägt Mischungsalternativen vor.
+    Distanzen sind CIEDE2000-Farbabstände (Delta E).
+    Für ganze Paletten ist match_oil_paints deutlich schneller.
     """
-    def color_distance(c1: Tuple[int, int, int], c2: Tuple[int, int, int]) -> float:
-        """Berechnet Euklidische Distanz zwischen zwei RGB-Farben"""
-        return math.sqrt(sum((a - b) ** 2 for a, b in zip(c1, c2)))
-    
-    # Direkte Farbübereinstimmung suchen
-    closest_paint = None
-    min_distance = float('inf')
-    
-    for paint_rgb, paint in BASIC_OIL_PAINTS.items():
-        distance = color_distance(rgb, paint_rgb)
-        if distance < min_distance:
-            min_distance = distance
-            closest_paint = paint
-    
-    # Alternative Mischungen vorschlagen
-    suggested_mixtures = []
-    
-    # Prüfe vordefinierte Mischungsrezepte
-    for mixture_name, recipe in MIXING_RECIPES.items():
-        # Berechne theoretische Mischfarbe (vereinfacht)
-        if len(recipe["components"]) >= 2:
-            # Einfache gewichtete Durchschnittsmischung
-            total_ratio = sum(recipe["ratios"])
-            mixed_r = mixed_g = mixed_b = 0
-            
-            for component, ratio in zip(recipe["components"], recipe["ratios"]):
-                # Finde RGB-Werte der Komponente
-                for paint_rgb, paint in BASIC_OIL_PAINTS.items():
-                    if paint.name == component:
-                        weight = ratio / total_ratio
-                        mixed_r += paint_rgb[0] * weight
-                        mixed_g += paint_rgb[1] * weight
-                        mixed_b += paint_rgb[2] * weight
-                        break
-            
-            mixed_color = (int(mixed_r), int(mixed_g), int(mixed_b))
-            mixture_distance = color_distance(rgb, mixed_color)
-            
-            if mixture_distance < min_distance * 1.2:  # 20% Toleranz
-                suggested_mixtures.append({
-                    "name": mixture_name,
-                    "recipe": recipe,
-                    "distance": mixture_distance,
-                    "resulting_color": mixed_color
-                })
-    
-    # Sortiere Mischungen nach Genauigkeit
-    suggested_mixtures.sort(key=lambda x: x["distance"])
-    
-    return {
-        "closest_pure_paint": closest_paint,
-        "distance": min_distance,
-        "suggested_mixtures": suggested_mixtures[:3],  # Top 3 Vorschläge
-        "painting_tips": get_painting_tips(rgb, closest_paint),
-        "color_properties": analyze_oil_paint_properties(rgb)
-    }
+    return match_oil_paints([rgb]).match(0)
 
 # Spezifische Maltipps für jede Farbe - basierend auf echter Praxis
 SPECIFIC_PAINTING_TIPS = {
@@ -0,0 +1,143 @@
+import os
+
+from oil_paint_data import OilPaint
+from pantone_data import file_fingerprint, find_data_files, parse_entry_rgb, read_entries
+
+# Directories scanned for manufacturer catalogues (*.csv / *.json).
+# FARBDIEB_PAINT_PATH adds more (os.pathsep separated).
+PAINT_CATALOGUE_DIRS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'paint_catalogues')]
+
+# Allowed values of the categorical columns, in code order
+OPACITIES = ('transparent', 'semi-opaque', 'opaque')
+DRYING_TIMES = ('fast', 'medium', 'slow')
+PRICE_CATEGORIES = ('student', 'artist', 'professional')
+
+# Defaults for optional catalogue columns (lightfastness 0 = not rated)
+CATALOGUE_DEFAULTS = {
+    'pigment': '',
+    'series': 1,
+    'opacity': 'semi-opaque',
+    'drying_time': 'medium',
+    'lightfastness': 0,
+    'price_category': 'artist'
+}
+
+def _choice(value, choices, column):
+    value = str(value).strip().lower()
+    if value not in choices:
+        raise ValueError(f"{column} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+def read_catalogue_file(path):
+    """Parse a catalogue file into a list of OilPaint.
+
+    Entries need a name and a color (hex, rgb or r, g, b columns as in Pantone
+    library files). Optional columns: brand (defaults to the file name),
+    pigment, series, opacity, drying_time, lightfastness, price_category and
+    scattering.
+    """
+    default_brand = os.path.splitext(os.path.basename(path))[0]
+    paints = []
+    for line, entry in enumerate(read_entries(path), start=1):
+        values = {column: entry[column] for column in CATALOGUE_DEFAULTS if entry.get(column) not in (None, '')}
+        values = {**CATALOGUE_DEFAULTS, **values}
+        try:
+            scattering = entry.get('scattering')
+            paints.append(OilPaint(
+                str(entry['name']).strip(),
+                str(values['pigment']).strip(),
+                parse_entry_rgb(entry),
+                _choice(values['opacity'], OPACITIES, 'opacity'),
+                _choice(values['drying_time'], DRYING_TIMES, 'drying_time'),
+                int(values['lightfastness']),
+                _choice(values['price_category'], PRICE_CATEGORIES, 'price_category'),
+                str(entry.get('brand') or default_brand).strip(),
+                int(values['series']),
+                scattering=float(scattering) if scattering not in (None, '') else None
+            ))
+        except (KeyError, ValueError, TypeError) as e:
+            raise ValueError(f"{path}: invalid entry {line}: {e}") from None
+    return paints
+
+def find_catalogue_files():
+    """{catalogue name: path} for every catalogue file in the catalogue directories"""
+    return find_data_files(PAINT_CATALOGUE_DIRS, 'FARBDIEB_PAINT_PATH')
+
+def catalogue_files_fingerprint():
+    """Identifies the catalogue files on disk - changes when one is added or edited"""
+    return '|'.join(f"{name}:{file_fingerprint(path)}" for name, path in find_catalogue_files().items())
+
+class PaintTable:
+    """Columnar store of paints from any number of brands.
+
+    Every attribute is one NumPy column - categorical ones (brand, opacity,
+    drying time, price category) as small integer codes - so filters are a
+    few vectorized comparisons even over thousands of paints. OilPaint
+    objects are only materialized for the rows a caller selects.
+    """
+
+    def __init__(self, paints):
+        import numpy as np
+        from color_spaces import srgb_to_lab
+
+        paints = list(paints)
+        self.names = [paint.name for paint in paints]
+        self.pigments = [paint.pigment for paint in paints]
+        self.brands = sorted({paint.brand for paint in paints})
+        brand_codes = {brand: code for code, brand in enumerate(self.brands)}
+        self.brand_codes = np.array([brand_codes[paint.brand] for paint in paints], dtype=np.int32)
+        self.series = np.array([paint.series for paint in paints], dtype=np.int32)
+        self.lightfastness = np.array([paint.lightfastness for paint in paints], dtype=np.int8)
+        self.opacity_codes = np.array([OPACITIES.index(paint.opacity) for paint in paints], dtype=np.int8)
+        self.drying_codes = np.array([DRYING_TIMES.index(paint.drying_time) for paint in paints], dtype=np.int8)
+        self.price_codes = np.array([PRICE_CATEGORIES.index(paint.price_category) for paint in paints],
+                                    dtype=np.int8)
+        self.rgb = np.array([paint.rgb for paint in paints], dtype=np.uint8).reshape(-1, 3)
+        self.lab = srgb_to_lab(self.rgb)
+        # Per-paint optical data is rare - kept with the rows it belongs to
+        self.extras = {i: (paint.mixing_ratio, paint.absorption, paint.scattering)
+                       for i, paint in enumerate(paints)
+                       if (paint.mixing_ratio, paint.absorption, paint.scattering) != (None, None, None)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def select(self, brands=None, series=None, min_lightfastness=None, price_categories=None, opacities=None):
+        """Row indices of the paints passing all given filters (None = no restriction)"""
+        import numpy as np
+
+        mask = np.ones(len(self), dtype=bool)
+        if brands is not None:
+            codes = [self.brands.index(brand) for brand in brands if brand in self.brands]
+            mask &= np.isin(self.brand_codes, codes)
+        if series is not None:
+            mask &= np.isin(self.series, [int(s) for s in series])
+        if min_lightfastness is not None:
+            mask &= self.lightfastness >= min_lightfastness
+        if price_categories is not None:
+            mask &= np.isin(self.price_codes, [PRICE_CATEGORIES.index(_choice(p, PRICE_CATEGORIES, 'price_category'))
+                                               for p in price_categories])
+        if opacities is not None:
+            mask &= np.isin(self.opacity_codes, [OPACITIES.index(_choice(o, OPACITIES, 'opacity'))
+                                                 for o in opacities])
+        return np.flatnonzero(mask)
+
+    def paint(self, i):
+        """Materialize row i as an OilPaint"""
+        mixing_ratio, absorption, scattering = self.extras.get(i, (None, None, None))
+        return OilPaint(self.names[i], self.pigments[i], tuple(int(c) for c in self.rgb[i]),
+                        OPACITIES[self.opacity_codes[i]], DRYING_TIMES[self.drying_codes[i]],
+                        int(self.lightfastness[i]), PRICE_CATEGORIES[self.price_codes[i]],
+                        self.brands[self.brand_codes[i]], int(self.series[i]),
+                        mixing_ratio, absorption, scattering)
+
+    def paints(self, indices=None):
+        """OilPaint objects for the given rows (all rows by default)"""
+        return [self.paint(int(i)) for i in (range(len(self)) if indices is None else indices)]
+
+def load_paint_table(extra_paints=()):
+    """One PaintTable over extra_paints followed by every discovered catalogue file"""
+    paints = list(extra_paints)
+    for path in find_catalogue_files().values():
+        paints.extend(read_catalogue_file(path))
+    return PaintTable(paints)
@@ -0,0 +1,327 @@
+import hashlib
+import itertools
+import math
+import os
+import pickle
+
+import numpy as np
+
+from color_spaces import (XYZ_TO_SRGB, chromatic_adaptation_matrix, linear_to_srgb,
+                          srgb_to_lab, srgb_to_linear)
+
+# Largest number of parts a single paint gets in an enumerated recipe (8:3:1)
+MAX_PARTS = 8
+
+# Numbers of paints combined in enumerated recipes
+MIX_SIZES = (2, 3)
+
+# Largest paint set a mixture index is built for - recipes grow with the cube
+# of the paint count (28 paints already give 1.45M)
+MAX_INDEXED_PAINTS = 32
+
+# Recipes fetched per requested result when repeated paint combinations are
+# dropped from query results
+DISTINCT_OVERSAMPLING = 16
+
+# Bump when the mixing model changes so cached indexes are rebuilt
+MIXING_MODEL_VERSION = 2
+
+# Cached indexes (about 80 MB each, one per paint selection) kept on disk;
+# the least recently used beyond this are deleted
+MAX_CACHED_INDEXES = 4
+
+# Kubelka-Munk mixing runs on reflectance spectra in 10 nm bands
+WAVELENGTHS = np.arange(380, 731, 10)
+
+# Darkest reflectance a masstone is modeled with - a paint layer never absorbs
+# everything, and unbounded K/S would let near-black paints swamp any mixture
+MIN_REFLECTANCE = 0.02
+
+# Scattering S of paints without own data (relative units)
+DEFAULT_SCATTERING = 1.0
+
+# Recipes mixed per block while enumerating, bounds the (recipes, bands) temporaries
+MIX_BLOCK_SIZE = 1 << 17
+
+def _lobe(wavelengths, mean, sigma_below, sigma_above):
+    sigma = np.where(wavelengths < mean, sigma_below, sigma_above)
+    return np.exp(-0.5 * ((wavelengths - mean) / sigma) ** 2)
+
+def color_matching_functions(wavelengths):
+    """(3, bands) CIE 1931 2° observer - multi-lobe fit of Wyman, Sloan & Shirley (2013)"""
+    w = np.asarray(wavelengths, dtype=np.float64)
+    x = 1.056 * _lobe(w, 599.8, 37.9, 31.0) + 0.362 * _lobe(w, 442.0, 16.0, 26.7) - 0.065 * _lobe(w, 501.1, 20.4, 26.2)
+    y = 0.821 * _lobe(w, 568.8, 46.9, 40.5) + 0.286 * _lobe(w, 530.9, 16.3, 31.1)
+    z = 1.217 * _lobe(w, 437.0, 11.8, 36.0) + 0.681 * _lobe(w, 459.0, 26.0, 13.8)
+    return np.stack([x, y, z])
+
+def _spectrum_to_linear_rgb_matrix():
+    cmf = color_matching_functions(WAVELENGTHS)
+    # Equal-energy light, adapted to D65; rows scaled so the perfect white reflector is (1, 1, 1)
+    white = cmf.sum(axis=1)
+    to_rgb = XYZ_TO_SRGB @ chromatic_adaptation_matrix(white / white[1], 'D65') @ cmf
+    return to_rgb / to_rgb.sum(axis=1, keepdims=True)
+
+# Reflectance spectrum -> linear sRGB
+SPECTRUM_TO_LINEAR_RGB = _spectrum_to_linear_rgb_matrix()
+
+def reflectance_spectra(rgb, tolerance=1e-9, max_iterations=50):
+    """(N, bands) smooth reflectance curves in (0, 1) reproducing (N, 3) sRGB colors.
+
+    Burns' least hyperbolic tangent slope squared method: the flattest curve
+    with the target's linear RGB, solved by batched Newton iterations.
+    Linear values are kept within MIN_REFLECTANCE and just below 1.
+    """
+    target = np.clip(srgb_to_linear(np.asarray(rgb, dtype=np.float64).reshape(-1, 3)),
+                     MIN_REFLECTANCE, 1 - 1e-4)
+    matrix = SPECTRUM_TO_LINEAR_RGB
+    count, bands = len(target), matrix.shape[1]
+    slope = 4 * np.eye(bands) - 2 * np.eye(bands, k=1) - 2 * np.eye(bands, k=-1)
+    slope[0, 0] = slope[-1, -1] = 2
+    diagonal = np.arange(bands)
+
+    z = np.zeros((count, bands))
+    multipliers = np.zeros((count, 3))
+    jacobian = np.zeros((count, bands + 3, bands + 3))
+    for _ in range(max_iterations):
+        t = np.tanh(z)
+        derivative = (1 - t * t) / 2
+        weighted = multipliers @ matrix
+        residual = np.concatenate([z @ slope + derivative * weighted,
+                                   (t + 1) / 2 @ matrix.T - target], axis=1)
+        if np.abs(residual).max() < tolerance:
+            break
+        jacobian[:, :bands, :bands] = slope
+        jacobian[:, diagonal, diagonal] -= 2 * t * derivative * weighted
+        jacobian[:, :bands, bands:] = derivative[:, :, None] * matrix.T
+        jacobian[:, bands:, :bands] = matrix * derivative[:, None, :]
+        step = np.linalg.solve(jacobian, -residual[..., None])[..., 0]
+        z += step[:, :bands]
+        multipliers += step[:, bands:]
+    return (np.tanh(z) + 1) / 2
+
+def absorption_scattering_ratio(reflectance):
+    """Kubelka-Munk K/S of an opaque layer with the given reflectance"""
+    return (1 - reflectance) ** 2 / (2 * reflectance)
+
+def reflectance_from_ratio(ratio):
+    """Reflectance of an opaque layer with the given K/S (inverse of absorption_scattering_ratio)"""
+    return 1 + ratio - np.sqrt(ratio * ratio + 2 * ratio)
+
+class PaintOptics:
+    """Kubelka-Munk description of a paint set for mixing.
+
+    `absorption` and `scattering` hold K and S per paint and band, taken from
+    the paints' own data where present. Otherwise S is DEFAULT_SCATTERING and
+    K follows from the reflectance curve of the catalogue color. `residual` is
+    the linear-RGB gap between catalogue color and K/S prediction; it enters
+    mixtures by weight, so pure paints keep their catalogue color exactly.
+    """
+
+    def __init__(self, paints):
+        rgb = np.array([paint.rgb for paint in paints], dtype=np.float64).reshape(-1, 3)
+        bands = len(WAVELENGTHS)
+        self.scattering = np.array([
+            np.broadcast_to(DEFAULT_SCATTERING if paint.scattering is None else paint.scattering, bands)
+            for paint in paints], dtype=np.float64).reshape(-1, bands)
+        absorption = self.scattering * absorption_scattering_ratio(reflectance_spectra(rgb))
+        for i, paint in enumerate(paints):
+            if paint.absorption is not None:
+                if len(paint.absorption) != bands:
+                    raise ValueError(f"{paint.name}: absorption needs {bands} bands "
+                                     f"({WAVELENGTHS[0]}-{WAVELENGTHS[-1]} nm), got {len(paint.absorption)}")
+                absorption[i] = paint.absorption
+        self.absorption = absorption
+        self.residual = srgb_to_linear(rgb) - self._linear(absorption / self.scattering)
+
+    def __len__(self):
+        return len(self.absorption)
+
+    @staticmethod
+    def _linear(ratio):
+        return reflectance_from_ratio(ratio) @ SPECTRUM_TO_LINEAR_RGB.T
+
+    def mix(self, components, weights):
+        """Predicted sRGB colors (..., m, 3), unrounded, of mixtures.
+
+        components holds (..., k) paint indices and weights the (..., m, k)
+        volume shares (summing to 1) - m mixtures per component set, so
+        (C, k) combinations and (R, k) ratios give (C, R, 3) colors.
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        absorption = weights @ self.absorption[components]
+        scattering = weights @ self.scattering[components]
+        linear = self._linear(absorption / scattering) + weights @ self.residual[components]
+        return linear_to_srgb(np.clip(linear, 0, 1))
+
+def ratio_grid(size, max_parts=MAX_PARTS):
+    """(R, size) array of all integer part tuples 1..max_parts without a common divisor"""
+    return np.array([parts for parts in itertools.product(range(1, max_parts + 1), repeat=size)
+                     if math.gcd(*parts) == 1], dtype=np.uint8)
+
+class MixtureIndex:
+    """Every 2- and 3-paint recipe of a paint set over an integer ratio grid.
+
+    Recipes are stored column-wise: `components` holds paint indices (-1 for
+    unused slots), `parts` the integer parts per component and `rgb` the
+    predicted color. A LabMatcher over the predicted colors answers inverse
+    mixing queries - which recipes come closest to a target color.
+    """
+
+    def __init__(self, paints, components, parts, rgb, matcher):
+        self.paints = paints
+        self.components = components
+        self.parts = parts
+        self.rgb = rgb
+        self.matcher = matcher
+
+    def __len__(self):
+        return len(self.components)
+
+    def query(self, rgb, count=3, distinct=True):
+        """(N, count) indices of the closest recipes for (N, 3) sRGB targets and their CIEDE2000 distances.
+
+        With distinct set each paint combination appears once (at its best
+        ratio) instead of filling the result with near-identical ratios.
+        """
+        from color_matching import delta_e_2000
+
+        lab = srgb_to_lab(np.asarray(rgb, dtype=np.float64).reshape(-1, 3))
+        fetch = count * DISTINCT_OVERSAMPLING if distinct else count
+        indices = self.matcher.nearest(lab, fetch)
+        distances = delta_e_2000(self.matcher.lab[indices], lab[:, None, :])
+        if distinct:
+            keep = np.array([self._distinct_columns(row, count) for row in indices])
+            indices = np.take_along_axis(indices, keep, axis=1)
+            distances = np.take_along_axis(distances, keep, axis=1)
+        return indices, distances
+
+    def _distinct_columns(self, row, count):
+        """Positions of the first `count` recipes in row with new paint combinations"""
+        seen = set()
+        columns = []
+        for column, recipe in enumerate(row):
+            combination = self.components[recipe].tobytes()
+            if combination not in seen:
+                seen.add(combination)
+                columns.append(column)
+                if len(columns) == count:
+                    return columns
+        # Too few distinct combinations nearby - fill up with the next closest
+        rest = [column for column in range(len(row)) if column not in columns]
+        return columns + rest[:count - len(columns)]
+
+    def recipe(self, index, distance=None):
+        """A recipe as a dict in the shape of the curated mixing suggestions"""
+        used = self.components[index] >= 0
+        names = [self.paints[i].name for i in self.components[index][used]]
+        recipe = {
+            "name": " + ".join(names),
+            "recipe": {
+                "components": names,
+                "ratios": [int(p) for p in self.parts[index][used]],
+                "description": "Berechnete Mischung"
+            },
+            "resulting_color": tuple(int(c) for c in self.rgb[index])
+        }
+        if distance is not None:
+            recipe["distance"] = float(distance)
+        return recipe
+
+def enumerate_mixtures(optics, max_parts=MAX_PARTS, sizes=MIX_SIZES):
+    """(components, parts, predicted rgb) for all recipes of the given sizes"""
+    width = max(sizes)
+    all_components, all_parts, all_rgb = [], [], []
+    for size in sizes:
+        combos = np.array(list(itertools.combinations(range(len(optics)), size)), dtype=np.int16)
+        ratios = ratio_grid(size, max_parts)
+        if not len(combos):
+            continue
+        weights = ratios / ratios.sum(axis=1, keepdims=True)
+        # (combos, ratios, 3) per block of combinations
+        block = max(1, MIX_BLOCK_SIZE // len(ratios))
+        mixed = np.concatenate([optics.mix(combos[start:start + block], weights)
+                                for start in range(0, len(combos), block)])
+
+        components = np.full((len(combos), len(ratios), width), -1, dtype=np.int16)
+        components[:, :, :size] = combos[:, None, :]
+        parts = np.zeros((len(combos), len(ratios), width), dtype=np.uint8)
+        parts[:, :, :size] = ratios[None, :, :]
+        all_components.append(components.reshape(-1, width))
+        all_parts.append(parts.reshape(-1, width))
+        all_rgb.append(mixed.reshape(-1, 3))
+    return np.concatenate(all_components), np.concatenate(all_parts), np.concatenate(all_rgb)
+
+def build_mixture_index(paints, max_parts=MAX_PARTS, sizes=MIX_SIZES):
+    """Enumerate and index all recipes of the paints (no disk cache)"""
+    from color_matching import LabMatcher
+
+    components, parts, rgb = enumerate_mixtures(PaintOptics(paints), max_parts, sizes)
+    matcher = LabMatcher(srgb_to_lab(rgb))
+    rgb = np.clip(np.rint(rgb), 0, 255).astype(np.uint8)
+    return MixtureIndex(list(paints), components, parts, rgb, matcher)
+
+def mixture_index_checksum(paints, max_parts=MAX_PARTS, sizes=MIX_SIZES):
+    """Identifies an index - changes with the paint colors and optics, grid or mixing model"""
+    digest = hashlib.sha256(repr([(paint.name, paint.rgb, paint.absorption, paint.scattering)
+                                  for paint in paints]).encode())
+    digest.update(repr((max_parts, tuple(sizes), MIXING_MODEL_VERSION)).encode())
+    return digest.hexdigest()
+
+def get_mixture_index(paints, max_parts=MAX_PARTS, sizes=MIX_SIZES):
+    """Load the paints' mixture index from the cache directory, building it on first use.
+
+    The recipe arrays and the KD-tree are stored together, so later processes
+    skip both the enumeration and the tree construction. Only the
+    MAX_CACHED_INDEXES most recently used indexes are kept.
+    """
+    from cache_utils import atomic_write, get_cache_dir
+    from color_matching import LabMatcher
+
+    cache_dir = get_cache_dir('mixtures')
+    path = os.path.join(cache_dir, f"{mixture_index_checksum(paints, max_parts, sizes)[:24]}.pickle")
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        os.utime(path)  # Mark as recently used
+        tree = data['tree']
+        matcher = LabMatcher(tree.data if tree is not None else data['lab'], tree=tree)
+        return MixtureIndex(list(paints), data['components'], data['parts'], data['rgb'], matcher)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Rebuilding unreadable mixture index {path}: {e}")
+
+    index = build_mixture_index(paints, max_parts, sizes)
+    data = {
+        'components': index.components,
+        'parts': index.parts,
+        'rgb': index.rgb,
+        'tree': index.matcher.tree,
+        # Without scipy there is no tree to carry the Lab values
+        'lab': index.matcher.lab if index.matcher.tree is None else None
+    }
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with atomic_write(path) as tmp_path, open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _evict_mixture_indexes(cache_dir)
+    except OSError as e:
+        print(f"Could not cache mixture index: {e}")
+    return index
+
+def _evict_mixture_indexes(cache_dir, keep=MAX_CACHED_INDEXES):
+    """Delete all but the `keep` most recently used index files"""
+    entries = []
+    for filename in os.listdir(cache_dir):
+        if filename.endswith('.pickle'):
+            path = os.path.join(cache_dir, filename)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                pass  # Evicted by another process
+    for _, path in sorted(entries, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
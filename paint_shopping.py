@@ -0,0 +1,177 @@
+import itertools
+
+import numpy as np
+
+from color_spaces import srgb_to_lab
+from paint_mixing import PaintOptics, ratio_grid
+
+# Largest CIEDE2000 distance at which a color counts as reachable
+DEFAULT_TOLERANCE = 5.0
+
+# Paints considered per palette color: its nearest catalogue paints plus the
+# lightest and darkest paint of the catalogue for tints and shades
+POOL_NEAREST = 6
+
+# Ratio grid of the mixtures tried (coarser than the mixture index - a
+# shopping list needs reachability, not the exact recipe)
+SHOPPING_MAX_PARTS = 4
+
+# Mixtures compared against the palette per block
+DISTANCE_BLOCK_SIZE = 1 << 14
+
+# For in-gamut sRGB colors ΔE76 stays below 7.7x CIEDE2000 (worst near
+# saturated blue) - pairs farther apart in Lab skip the exact formula
+DELTA_E76_BOUND = 8.0
+
+# Set bits per byte value, for popcounts over packed bitsets
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.int32)
+
+def candidate_combinations(catalogue, lab, nearest=POOL_NEAREST, sizes=(1, 2, 3)):
+    """Sorted (C, 3) paint index combinations (-1 padded) worth trying for the Lab colors"""
+    pools = catalogue.paint_matcher.nearest(lab, nearest)
+    extremes = [int(np.argmax(catalogue.lab[:, 0])), int(np.argmin(catalogue.lab[:, 0]))]
+    combinations = set()
+    for pool in pools:
+        pool = sorted(set(pool.tolist()) | set(extremes))
+        for size in sizes:
+            combinations.update(itertools.combinations(pool, size))
+    combinations = sorted(combinations, key=lambda combination: (len(combination), combination))
+    result = np.full((len(combinations), 3), -1, dtype=np.int32)
+    for i, combination in enumerate(combinations):
+        result[i, :len(combination)] = combination
+    return result
+
+def mix_combinations(catalogue, combinations, max_parts=SHOPPING_MAX_PARTS):
+    """(combination ids, parts, predicted rgb) of every ratio of every combination"""
+    paints = np.unique(combinations[combinations >= 0])
+    optics = PaintOptics([catalogue.paints[i] for i in paints])
+    local = np.searchsorted(paints, combinations)
+
+    all_ids, all_parts, all_rgb = [], [], []
+    sizes = (combinations >= 0).sum(axis=1)
+    for size in np.unique(sizes):
+        ids = np.flatnonzero(sizes == size)
+        ratios = ratio_grid(size, max_parts)
+        weights = ratios / ratios.sum(axis=1, keepdims=True)
+        mixed = optics.mix(local[ids, :size], weights)
+        parts = np.zeros((len(ids), len(ratios), 3), dtype=np.uint8)
+        parts[:, :, :size] = ratios[None, :, :]
+        all_ids.append(np.repeat(ids, len(ratios)))
+        all_parts.append(parts.reshape(-1, 3))
+        all_rgb.append(mixed.reshape(-1, 3))
+    return np.concatenate(all_ids), np.concatenate(all_parts), np.concatenate(all_rgb)
+
+def reachable_pairs(mixture_lab, lab, tolerance):
+    """(mixture, color, distance) arrays of every mixture within tolerance of a palette color"""
+    from color_matching import delta_e_2000
+
+    radius = (DELTA_E76_BOUND * tolerance) ** 2
+    mixtures, colors, distances = [], [], []
+    for start in range(0, len(mixture_lab), DISTANCE_BLOCK_SIZE):
+        block = mixture_lab[start:start + DISTANCE_BLOCK_SIZE]
+        rows, columns = np.nonzero(((block[:, None, :] - lab[None, :, :]) ** 2).sum(axis=2) <= radius)
+        exact = delta_e_2000(block[rows], lab[columns])
+        within = exact <= tolerance
+        mixtures.append(rows[within] + start)
+        colors.append(columns[within])
+        distances.append(exact[within])
+    return np.concatenate(mixtures), np.concatenate(colors), np.concatenate(distances)
+
+def greedy_paint_cover(combinations, coverage, paint_count):
+    """Smallest paint set (greedy) whose combinations reach every reachable color.
+
+    coverage holds one packed bitset of reached colors per combination. Each
+    step takes the combination adding the most newly reached colors per newly
+    bought paint - combinations of already bought paints are free. Paints that
+    turn out redundant are dropped afterwards.
+    """
+    def usable(bought):
+        # Padding slots point at an always-bought sentinel
+        return np.append(bought, True)[combinations].all(axis=1)
+
+    def reached(bought):
+        return np.bitwise_or.reduce(coverage[usable(bought)], axis=0)
+
+    target = np.bitwise_or.reduce(coverage, axis=0)
+    bought = np.zeros(paint_count, dtype=bool)
+    order = []
+    covered = np.zeros_like(target)
+    while (covered != target).any():
+        gain = _POPCOUNT[coverage & ~covered].sum(axis=1)
+        new_paints = (~np.append(bought, True)[combinations]).sum(axis=1)
+        score = np.where(gain > 0, gain / np.maximum(new_paints, 1), 0) + (new_paints == 0) * gain
+        best = int(np.argmax(score))
+        for paint in combinations[best][combinations[best] >= 0]:
+            if not bought[paint]:
+                bought[paint] = True
+                order.append(int(paint))
+        covered = reached(bought)
+
+    # Last bought first - early picks usually carry the most colors
+    for paint in reversed(list(order)):
+        bought[paint] = False
+        if (reached(bought) != target).any():
+            bought[paint] = True
+        else:
+            order.remove(paint)
+    return order, usable(bought)
+
+def plan_shopping_list(rgb_colors, tolerance=DEFAULT_TOLERANCE, catalogue=None,
+                       max_parts=SHOPPING_MAX_PARTS, nearest=POOL_NEAREST):
+    """Pick few paints from which every palette color can be mixed within tolerance (CIEDE2000).
+
+    Candidate mixtures are the pure paints and all 2- and 3-paint ratios up
+    to max_parts from each color's nearest paints (plus the lightest and
+    darkest paint). Returns a dict with the 'paints' to buy, per color the
+    best 'recipe' from them and its 'distance', and the indices of
+    'unreachable' colors, for which only the nearest paint is named.
+    """
+    if catalogue is None:
+        from oil_paint_data import get_oil_paint_catalogue
+        catalogue = get_oil_paint_catalogue()
+    rgb = np.asarray(rgb_colors).reshape(-1, 3)
+    lab = srgb_to_lab(rgb)
+
+    combinations = candidate_combinations(catalogue, lab, nearest)
+    ids, parts, mixed = mix_combinations(catalogue, combinations, max_parts)
+    mixtures, colors, distances = reachable_pairs(srgb_to_lab(mixed), lab, tolerance)
+
+    reach = np.zeros((len(combinations), len(rgb)), dtype=bool)
+    reach[ids[mixtures], colors] = True
+    order, usable = greedy_paint_cover(combinations, np.packbits(reach, axis=1), len(catalogue))
+
+    # Best recipe per color among mixtures of the bought paints
+    keep = usable[ids[mixtures]]
+    mixtures, colors, distances = mixtures[keep], colors[keep], distances[keep]
+    best = np.lexsort((distances, colors))
+    first = best[np.r_[True, colors[best][1:] != colors[best][:-1]]] if len(best) else best
+
+    entries = [None] * len(rgb)
+    for m in first:
+        combination = combinations[ids[mixtures[m]]]
+        used = combination >= 0
+        entries[colors[m]] = {
+            "rgb": tuple(int(c) for c in rgb[colors[m]]),
+            "recipe": {
+                "components": [catalogue.paints[i].name for i in combination[used]],
+                "ratios": [int(p) for p in parts[mixtures[m]][used]]
+            },
+            "resulting_color": tuple(int(c) for c in np.clip(np.rint(mixed[mixtures[m]]), 0, 255)),
+            "distance": float(distances[m])
+        }
+    unreachable = [i for i, entry in enumerate(entries) if entry is None]
+    if unreachable:
+        paint_indices, paint_distances = catalogue.paint_matcher.query(lab[unreachable])
+        for i, paint, distance in zip(unreachable, paint_indices, paint_distances):
+            entries[i] = {
+                "rgb": tuple(int(c) for c in rgb[i]),
+                "recipe": None,
+                "nearest_paint": catalogue.paints[paint].name,
+                "distance": float(distance)
+            }
+    return {
+        "paints": [catalogue.paints[i] for i in order],
+        "colors": entries,
+        "unreachable": unreachable,
+        "tolerance": tolerance
+    }
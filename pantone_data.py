@@ -1,3 +1,7 @@
+import csv
+import json
+import os
+import struct
 
 pantone_colors = {
     (186, 12, 47): "Pantone 186 C",
@@ -14,9 +18,289 @@ pantone_colors = {
     (128, 128, 128): "Pantone Cool Gray 8 C"
 }
 
-def rgb_to_pantone_name(rgb):
-    def distance(c1, c2):
-        return sum((a - b) ** 2 for a, b in zip(c1, c2)) ** 0.5
+# Name of the built-in library made from pantone_colors
+BASIC_LIBRARY = 'basic'
 
-    closest = min(pantone_colors.keys(), key=lambda c: distance(rgb, c))
-    return pantone_colors[closest]
+# Directories scanned for library files (*.csv / *.json); the file stem becomes
+# the library name. FARBDIEB_PANTONE_PATH adds more (os.pathsep separated).
+PANTONE_LIBRARY_DIRS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pantone_libraries')]
+
+# Compiled library layout: header, uint8 RGB, float32 Lab, uint32 name offsets, UTF-8 names
+COMPILED_MAGIC = b'FDPL'
+COMPILED_VERSION = 1
+_HEADER = struct.Struct('<4sHHI')  # magic, version, reserved, entry count
+
+class LibraryNames:
+    """Read-only sequence of entry names, decoded on access from the string table"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return bytes(self._blob[start:end]).decode('utf-8')
+
+class PantoneIndex:
+    """Perceptual nearest-neighbour index over a Pantone library, built once and queried in batches"""
+
+    def __init__(self, rgb, names, lab=None, name='custom'):
+        # numpy is only needed once colors are matched - keeps this module light to import
+        import numpy as np
+        from color_matching import LabMatcher
+        self.name = name
+        self.names = names
+        self.rgb = np.asarray(rgb).reshape(-1, 3)
+        self.matcher = LabMatcher(lab) if lab is not None else LabMatcher.from_rgb(self.rgb)
+        self.lab = self.matcher.lab
+        self._lookup_tables = {}
+
+    @classmethod
+    def from_dict(cls, colors, name='custom'):
+        """Index an {rgb: name} mapping such as pantone_colors"""
+        return cls(list(colors.keys()), list(colors.values()), name=name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def query(self, rgb_array, return_distance=False, metric=None, lookup_bits=None):
+        """Indices of the nearest library colors (CIEDE2000 by default) for an (N, 3) array.
+
+        With lookup_bits the colors are matched through a precomputed RGB
+        lookup table of that resolution instead (see lookup_table).
+        """
+        options = {'metric': metric} if metric else {}
+        if lookup_bits:
+            return self.lookup_table(lookup_bits, **options).lookup(rgb_array, return_distance=return_distance)
+        indices, distances = self.matcher.query_rgb(rgb_array, **options)
+        return (indices, distances) if return_distance else indices
+
+    def lookup_table(self, bits=6, **options):
+        """The memory-mapped RGB lookup table for this library, built on first use"""
+        from color_matching import get_lookup_table
+        key = (bits, tuple(sorted(options.items())))
+        if key not in self._lookup_tables:
+            self._lookup_tables[key] = get_lookup_table(self.matcher, bits=bits, name=f"pantone-{self.name}",
+                                                        **options)
+        return self._lookup_tables[key]
+
+def read_entries(path):
+    """Raw entries of a CSV (header row) or JSON (list of objects) file, keys lowercased"""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            entries = list(csv.DictReader(f))
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError(f"{path}: expected a list of objects")
+    return [{str(k).strip().lower(): v for k, v in entry.items()} for entry in entries]
+
+def parse_entry_rgb(entry):
+    """RGB tuple of an entry from its hex, rgb ("12,34,56", "12 34 56" or a list) or r, g, b fields"""
+    rgb_value = entry.get('rgb')
+    if isinstance(rgb_value, str):
+        # CSV cells arrive as text - "12, 34, 56" or "(12 34 56)"
+        rgb_value = rgb_value.strip().strip('()').replace(',', ' ').split()
+    if entry.get('hex'):
+        value = str(entry['hex']).strip().lstrip('#')
+        if len(value) != 6:
+            raise ValueError(f"expected a 6-digit hex color, got {entry['hex']!r}")
+        rgb = tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+    elif rgb_value:
+        rgb = tuple(int(c) for c in rgb_value)
+    else:
+        # Empty rgb cell: fall back to the r, g, b columns
+        rgb = (int(entry['r']), int(entry['g']), int(entry['b']))
+    if len(rgb) != 3:
+        raise ValueError(f"expected 3 RGB components, got {len(rgb)}")
+    if not all(0 <= c <= 255 for c in rgb):
+        raise ValueError(f"RGB value out of range: {rgb}")
+    return rgb
+
+def read_library_file(path):
+    """Parse a library file into (rgb list, name list).
+
+    CSV files need a header with a name column plus either r, g, b columns or
+    a hex column. JSON files hold a list of objects with name and rgb or hex.
+    """
+    rgb, names = [], []
+    for line, entry in enumerate(read_entries(path), start=1):
+        try:
+            color, name = parse_entry_rgb(entry), str(entry['name']).strip()
+        except (KeyError, ValueError, TypeError) as e:
+            raise ValueError(f"{path}: invalid entry {line}: {e}") from None
+        rgb.append(color)
+        names.append(name)
+    return rgb, names
+
+def compile_library(rgb, names, path):
+    """Write a library in the compact binary format load_compiled_library maps"""
+    import numpy as np
+    from color_spaces import srgb_to_lab
+
+    rgb = np.asarray(rgb, dtype=np.uint8).reshape(-1, 3)
+    lab = srgb_to_lab(rgb).astype(np.float32)
+    encoded = [name.encode('utf-8') for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(name) for name in encoded])
+
+    from cache_utils import atomic_write
+
+    with atomic_write(path) as tmp_path, open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(COMPILED_MAGIC, COMPILED_VERSION, 0, len(rgb)))
+        f.write(rgb.tobytes())
+        f.write(b'\0' * (-f.tell() % 4))  # Keep the float32 block aligned
+        f.write(lab.astype('<f4').tobytes())
+        f.write(offsets.astype('<u4').tobytes())
+        f.write(b''.join(encoded))
+
+def load_compiled_library(path):
+    """Memory-map a compiled library - returns (rgb, lab, names) backed by the file"""
+    import numpy as np
+    with open(path, 'rb') as f:
+        magic, version, _, count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != COMPILED_MAGIC or version != COMPILED_VERSION:
+        raise ValueError(f"Not a compiled Pantone library (version {COMPILED_VERSION}): {path}")
+
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    offset = _HEADER.size
+    rgb = raw[offset:offset + 3 * count].reshape(count, 3)
+    offset += 3 * count
+    offset += -offset % 4
+    lab = raw[offset:offset + 12 * count].view('<f4').reshape(count, 3)
+    offset += 12 * count
+    offsets = raw[offset:offset + 4 * (count + 1)].view('<u4')
+    offset += 4 * (count + 1)
+    return rgb, lab, LibraryNames(offsets, raw[offset:])
+
+def load_pantone_library(path):
+    """Load a library file, compiling it to the binary format on first use.
+
+    The compiled file is stored in the cache directory and keyed by the source
+    file's content hash, so edits to the source trigger a recompile.
+    """
+    # Cache location lives with the result cache; only needed on this path
+    from cache_utils import get_cache_dir, hash_file
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_dir = get_cache_dir('pantone')
+    compiled = os.path.join(cache_dir, f"{stem}-{hash_file(path)[:16]}-v{COMPILED_VERSION}.fdpl")
+    if not os.path.exists(compiled):
+        os.makedirs(cache_dir, exist_ok=True)
+        rgb, names = read_library_file(path)
+        compile_library(rgb, names, compiled)
+
+    rgb, lab, names = load_compiled_library(compiled)
+    return PantoneIndex(rgb, names, lab=lab, name=stem)
+
+def find_data_files(directories, env_var):
+    """{file stem: path} of the CSV/JSON files in directories and those listed in env_var (first wins)"""
+    dirs = list(directories)
+    dirs += [d for d in os.environ.get(env_var, '').split(os.pathsep) if d]
+    files = {}
+    for directory in dirs:
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() in ('.csv', '.json'):
+                files.setdefault(stem, os.path.join(directory, filename))
+    return files
+
+def file_fingerprint(path):
+    """Size and mtime of a data file - changes when it is edited"""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def find_library_files():
+    """{library name: path} for every library file in the library directories"""
+    return find_data_files(PANTONE_LIBRARY_DIRS, 'FARBDIEB_PANTONE_PATH')
+
+_libraries = {}
+_selected_libraries = None  # None selects every available library
+
+def available_pantone_libraries():
+    """Names of the built-in and all discovered libraries"""
+    return [BASIC_LIBRARY] + [name for name in find_library_files() if name != BASIC_LIBRARY]
+
+def get_pantone_library(name=BASIC_LIBRARY):
+    """The index of a library by name, loaded on first use"""
+    if name not in _libraries:
+        if name == BASIC_LIBRARY:
+            _libraries[name] = PantoneIndex.from_dict(pantone_colors, name=name)
+        else:
+            files = find_library_files()
+            if name not in files:
+                raise KeyError(f"Unknown Pantone library: {name}")
+            _libraries[name] = load_pantone_library(files[name])
+    return _libraries[name]
+
+def get_pantone_index():
+    """The index over the built-in pantone_colors library"""
+    return get_pantone_library(BASIC_LIBRARY)
+
+def invalidate_pantone_index():
+    """Drop loaded libraries - call after modifying pantone_colors or library files"""
+    _libraries.clear()
+
+def select_pantone_libraries(names=None):
+    """Choose the libraries rgb_to_pantone_name(s) search by default (None = all)"""
+    global _selected_libraries
+    _selected_libraries = list(names) if names is not None else None
+
+def selected_pantone_libraries():
+    return list(_selected_libraries) if _selected_libraries is not None else available_pantone_libraries()
+
+def pantone_libraries_fingerprint(libraries=None):
+    """Identifies the library set a match depends on - changes when a library file does"""
+    parts = []
+    files = find_library_files()
+    for name in libraries or selected_pantone_libraries():
+        if name == BASIC_LIBRARY:
+            parts.append(f"{name}:{sorted(pantone_colors.items())}")
+        elif name in files:
+            parts.append(f"{name}:{file_fingerprint(files[name])}")
+        else:
+            parts.append(name)
+    return '|'.join(parts)
+
+def rgb_to_pantone_names(rgb_array, libraries=None, metric=None, lookup_bits=None):
+    """Match N colors in one vectorized call, returning their Pantone names.
+
+    Searches the given library names, or the selected libraries by default,
+    and returns the perceptually closest entry across all of them (CIEDE2000
+    unless another color_matching metric is given). lookup_bits switches to
+    precomputed lookup tables for large inputs.
+    """
+    import numpy as np
+    best_names = None
+    best_distances = None
+    for name in libraries or selected_pantone_libraries():
+        index = get_pantone_library(name)
+        indices, distances = index.query(rgb_array, return_distance=True, metric=metric,
+                                         lookup_bits=lookup_bits)
+        if best_names is None:
+            best_names = [index.names[i] for i in indices]
+            best_distances = distances
+            continue
+        for i in np.flatnonzero(distances < best_distances):
+            best_names[i] = index.names[indices[i]]
+        best_distances = np.minimum(best_distances, distances)
+    return best_names
+
+def match_image_to_pantone(pixels, library=BASIC_LIBRARY, lookup_bits=6):
+    """Match every pixel of an (H, W, 3) image to a library entry via its lookup table.
+
+    Returns an (H, W) index array plus the library names it indexes into.
+    """
+    index = get_pantone_library(library)
+    return index.lookup_table(lookup_bits).lookup_image(pixels), index.names
+
+def rgb_to_pantone_name(rgb, libraries=None, metric=None):
+    return rgb_to_pantone_names([rgb], libraries=libraries, metric=metric)[0]
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from cache_utils import ResultCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / 'results'))
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / 'image.png'
+    path.write_bytes(b'not really a png')
+    return str(path)
+
+
+def test_key_changes_with_options(cache, image):
+    key = cache.key(image, num_colors=20, backend='kmeans')
+    assert cache.key(image, num_colors=20, backend='kmeans') == key
+    assert cache.key(image, num_colors=30, backend='kmeans') != key
+    assert cache.key(image, num_colors=20, backend='octree') != key
+    assert cache.key(image, num_colors=20, backend='kmeans', space='lab') != key
+
+
+def test_key_ignores_section_order(cache, image):
+    assert cache.key(image, sections=('basic', 'itten')) == cache.key(image, sections=['itten', 'basic'])
+    assert cache.key(image, sections=('basic',)) != cache.key(image, sections=('basic', 'itten'))
+
+
+def test_key_follows_file_content_not_path(cache, image, tmp_path):
+    copy = tmp_path / 'copy.png'
+    copy.write_bytes(open(image, 'rb').read())
+    assert cache.key(str(copy)) == cache.key(image)
+
+    with open(image, 'ab') as f:
+        f.write(b'edited')
+    assert cache.key(image) != cache.key(str(copy))
+
+
+def test_put_get_round_trip(cache, image):
+    key = cache.key(image, num_colors=5)
+    assert cache.get(key) is None
+    cache.put(key, {'hex_colors': ['#FF0000']})
+    assert cache.get(key) == {'hex_colors': ['#FF0000']}
+    assert not any(name.endswith('.tmp') for _, _, files in os.walk(cache.directory) for name in files)
@@ -0,0 +1,43 @@
+import pytest
+
+from paint_catalogues import read_catalogue_file
+from pantone_data import read_library_file
+
+
+def write_csv(tmp_path, text, name='library.csv'):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('cell', ['"12,34,56"', '"12, 34, 56"', '12 34 56', '"(12, 34, 56)"'])
+def test_rgb_column_is_split_into_components(tmp_path, cell):
+    path = write_csv(tmp_path, f"name,rgb\nTest,{cell}\n")
+    assert read_library_file(path) == ([(12, 34, 56)], ['Test'])
+
+
+def test_empty_rgb_column_falls_back_to_components(tmp_path):
+    path = write_csv(tmp_path, "name,rgb,r,g,b\nTest,,12,34,56\n")
+    assert read_library_file(path) == ([(12, 34, 56)], ['Test'])
+
+
+@pytest.mark.parametrize('cell', ['"12,34"', '"12,34,56,78"', '"12,34,256"', 'blue'])
+def test_invalid_rgb_column_is_rejected(tmp_path, cell):
+    path = write_csv(tmp_path, f"name,rgb\nTest,{cell}\n")
+    with pytest.raises(ValueError, match='invalid entry 1'):
+        read_library_file(path)
+
+
+def test_empty_rgb_without_components_is_rejected(tmp_path):
+    path = write_csv(tmp_path, "name,rgb\nTest,\n")
+    with pytest.raises(ValueError, match='invalid entry 1'):
+        read_library_file(path)
+
+
+def test_catalogue_reads_both_color_columns(tmp_path):
+    path = write_csv(tmp_path, "name,rgb,r,g,b\nRot,\"200, 30, 40\",,,\nBlau,,20,40,200\n", 'Gamblin.csv')
+    paints = read_catalogue_file(path)
+    assert [(paint.name, paint.rgb, paint.brand) for paint in paints] == [
+        ('Rot', (200, 30, 40), 'Gamblin'),
+        ('Blau', (20, 40, 200), 'Gamblin')
+    ]
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from color_matching import KDTREE_MIN_ENTRIES, PREFILTER_CANDIDATES, LabMatcher, delta_e_2000
+
+# Sharma, Wu & Dalal (2005), "The CIEDE2000 Color-Difference Formula",
+# test data: Lab 1, Lab 2, ΔE00
+SHARMA_PAIRS = [
+    ((50.0000, 2.6772, -79.7751), (50.0000, 0.0000, -82.7485), 2.0425),
+    ((50.0000, 3.1571, -77.2803), (50.0000, 0.0000, -82.7485), 2.8615),
+    ((50.0000, 2.8361, -74.0200), (50.0000, 0.0000, -82.7485), 3.4412),
+    ((50.0000, -1.3802, -84.2814), (50.0000, 0.0000, -82.7485), 1.0000),
+    ((50.0000, -1.1848, -84.8006), (50.0000, 0.0000, -82.7485), 1.0000),
+    ((50.0000, -0.9009, -85.5211), (50.0000, 0.0000, -82.7485), 1.0000),
+    ((50.0000, 0.0000, 0.0000), (50.0000, -1.0000, 2.0000), 2.3669),
+    ((50.0000, -1.0000, 2.0000), (50.0000, 0.0000, 0.0000), 2.3669),
+    ((50.0000, 2.4900, -0.0010), (50.0000, -2.4900, 0.0009), 7.1792),
+    ((50.0000, 2.4900, -0.0010), (50.0000, -2.4900, 0.0010), 7.1792),
+    ((50.0000, 2.4900, -0.0010), (50.0000, -2.4900, 0.0011), 7.2195),
+    ((50.0000, 2.4900, -0.0010), (50.0000, -2.4900, 0.0012), 7.2195),
+    ((50.0000, -0.0010, 2.4900), (50.0000, 0.0009, -2.4900), 4.8045),
+    ((50.0000, -0.0010, 2.4900), (50.0000, 0.0010, -2.4900), 4.8045),
+    ((50.0000, -0.0010, 2.4900), (50.0000, 0.0011, -2.4900), 4.7461),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 0.0000, -2.5000), 4.3065),
+    ((50.0000, 2.5000, 0.0000), (73.0000, 25.0000, -18.0000), 27.1492),
+    ((50.0000, 2.5000, 0.0000), (61.0000, -5.0000, 29.0000), 22.8977),
+    ((50.0000, 2.5000, 0.0000), (56.0000, -27.0000, -3.0000), 31.9030),
+    ((50.0000, 2.5000, 0.0000), (58.0000, 24.0000, 15.0000), 19.4535),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 3.1736, 0.5854), 1.0000),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 3.2972, 0.0000), 1.0000),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 1.8634, 0.5757), 1.0000),
+    ((50.0000, 2.5000, 0.0000), (50.0000, 3.2592, 0.3350), 1.0000),
+    ((60.2574, -34.0099, 36.2677), (60.4626, -34.1751, 39.4387), 1.2644),
+    ((63.0109, -31.0961, -5.8663), (62.8187, -29.7946, -4.0864), 1.2630),
+    ((61.2901, 3.7196, -5.3901), (61.4292, 2.2480, -4.9620), 1.8731),
+    ((35.0831, -44.1164, 3.7933), (35.0232, -40.0716, 1.5901), 1.8645),
+    ((22.7233, 20.0904, -46.6940), (23.0331, 14.9730, -42.5619), 2.0373),
+    ((36.4612, 47.8580, 18.3852), (36.2715, 50.5065, 21.2231), 1.4146),
+    ((90.8027, -2.0831, 1.4410), (91.1528, -1.6435, 0.0447), 1.4441),
+    ((90.9257, -0.5406, -0.9208), (88.6381, -0.8985, -0.7239), 1.5381),
+    ((6.7747, -0.2908, -2.4247), (5.8714, -0.0985, -2.2286), 0.6377),
+    ((2.0776, 0.0795, -1.1350), (0.9033, -0.0636, -0.5514), 0.9082),
+]
+
+
+def test_ciede2000_matches_sharma_reference_data():
+    lab1 = np.array([pair[0] for pair in SHARMA_PAIRS])
+    lab2 = np.array([pair[1] for pair in SHARMA_PAIRS])
+    expected = np.array([pair[2] for pair in SHARMA_PAIRS])
+    np.testing.assert_allclose(delta_e_2000(lab1, lab2), expected, atol=1e-4)
+
+
+def test_ciede2000_is_symmetric():
+    lab1 = np.array([pair[0] for pair in SHARMA_PAIRS])
+    lab2 = np.array([pair[1] for pair in SHARMA_PAIRS])
+    np.testing.assert_allclose(delta_e_2000(lab1, lab2), delta_e_2000(lab2, lab1))
+
+
+def random_library(seed, size, queries=500):
+    rng = np.random.default_rng(seed)
+    return (LabMatcher.from_rgb(rng.integers(0, 256, (size, 3))),
+            LabMatcher.from_rgb(rng.integers(0, 256, (queries, 3))).lab)
+
+
+def brute_force(matcher, queries):
+    return delta_e_2000(matcher.lab[None, :, :], queries[:, None, :])
+
+
+def test_small_library_query_is_exact():
+    matcher, queries = random_library(1, PREFILTER_CANDIDATES)
+    indices, distances = matcher.query(queries)
+
+    all_distances = brute_force(matcher, queries)
+    np.testing.assert_allclose(distances, all_distances.min(axis=1))
+    np.testing.assert_allclose(all_distances[np.arange(len(queries)), indices], distances)
+
+
+def test_query_without_prefilter_matches_brute_force_argmin():
+    matcher, queries = random_library(2, 4 * KDTREE_MIN_ENTRIES)
+    _, distances = matcher.query(queries, candidates=len(matcher))
+    np.testing.assert_allclose(distances, brute_force(matcher, queries).min(axis=1))
+
+
+def test_kdtree_prefilter_matches_brute_force_prefilter():
+    matcher, queries = random_library(3, 4 * KDTREE_MIN_ENTRIES)
+    assert matcher.tree is not None
+    brute = LabMatcher(matcher.lab)
+    brute._tree = None
+
+    indices, distances = matcher.query(queries)
+    brute_indices, brute_distances = brute.query(queries)
+    np.testing.assert_array_equal(indices, brute_indices)
+    np.testing.assert_allclose(distances, brute_distances)
+
+
+def test_prefiltered_query_is_nearly_always_exact():
+    # The Lab-Euclidean prefilter is a heuristic: rarely the CIEDE2000 nearest
+    # reference lies outside the PREFILTER_CANDIDATES Lab-nearest ones
+    matcher, queries = random_library(4, 4 * KDTREE_MIN_ENTRIES, queries=2000)
+    _, distances = matcher.query(queries)
+
+    exact = brute_force(matcher, queries).min(axis=1)
+    assert (distances >= exact - 1e-9).all()
+    assert np.mean(np.isclose(distances, exact)) >= 0.99
+
+
+def test_nearest_is_sorted_by_distance():
+    matcher, queries = random_library(5, PREFILTER_CANDIDATES, queries=50)
+    nearest = matcher.nearest(queries, 5)
+
+    all_distances = brute_force(matcher, queries)
+    expected = np.sort(all_distances, axis=1)[:, :5]
+    np.testing.assert_allclose(np.take_along_axis(all_distances, nearest, axis=1), expected)
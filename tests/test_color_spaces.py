@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from color_spaces import (chromatic_adaptation_matrix, lab_to_srgb, lch_to_srgb, oklab_to_srgb,
+                          srgb_to_lab, srgb_to_lch, srgb_to_oklab)
+
+
+@pytest.fixture
+def rgb():
+    return np.random.default_rng(0).integers(0, 256, (5000, 3))
+
+
+def test_lab_reference_values():
+    lab = srgb_to_lab(np.array([[255, 255, 255], [0, 0, 0], [255, 0, 0], [0, 0, 255]]))
+    expected = [[100, 0, 0], [0, 0, 0], [53.2408, 80.0925, 67.2032], [32.2970, 79.1875, -107.8602]]
+    np.testing.assert_allclose(lab, expected, atol=2e-3)
+
+
+@pytest.mark.parametrize('white', ['D65', 'D50'])
+def test_lab_round_trip(rgb, white):
+    np.testing.assert_allclose(lab_to_srgb(srgb_to_lab(rgb, white), white), rgb, atol=1e-6)
+
+
+def test_lch_round_trip(rgb):
+    np.testing.assert_allclose(lch_to_srgb(srgb_to_lch(rgb)), rgb, atol=1e-6)
+
+
+def test_uint8_lookup_matches_float_path(rgb):
+    np.testing.assert_allclose(srgb_to_lab(rgb.astype(np.uint8)), srgb_to_lab(rgb.astype(np.float64)))
+
+
+def test_oklab_reference_values():
+    oklab = srgb_to_oklab(np.array([[255, 255, 255], [255, 0, 0]]))
+    np.testing.assert_allclose(oklab, [[1, 0, 0], [0.62796, 0.22486, 0.12585]], atol=1e-4)
+
+
+def test_oklab_round_trip(rgb):
+    np.testing.assert_allclose(oklab_to_srgb(srgb_to_oklab(rgb)), rgb, atol=1e-6)
+
+
+def test_bradford_d65_to_d50_matrix():
+    # Lindbloom's published Bradford matrix for the same white points
+    expected = [[1.0478112, 0.0228866, -0.0501270],
+                [0.0295424, 0.9904844, -0.0170491],
+                [-0.0092345, 0.0150436, 0.7521316]]
+    np.testing.assert_allclose(chromatic_adaptation_matrix('D65', 'D50'), expected, atol=1e-6)
+
+
+def test_white_stays_neutral_under_d50():
+    np.testing.assert_allclose(srgb_to_lab(np.array([255, 255, 255]), 'D50'), [100, 0, 0], atol=1e-4)
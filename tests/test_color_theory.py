@@ -0,0 +1,28 @@
+import pickle
+
+import pytest
+
+from color_theory import FrozenDict, _freeze
+
+
+def test_equal_frozen_dicts_hash_equal_regardless_of_order():
+    first = _freeze({'hex': '#FF0000', 'rgb': (255, 0, 0), 'tips': ['a', 'b']})
+    second = _freeze({'tips': ['a', 'b'], 'rgb': (255, 0, 0), 'hex': '#FF0000'})
+    assert first == second
+    assert hash(first) == hash(second)
+    assert len({first, second}) == 1
+
+
+def test_frozen_dict_is_read_only():
+    frozen = FrozenDict(a=1)
+    with pytest.raises(TypeError):
+        frozen['a'] = 2
+    with pytest.raises(TypeError):
+        frozen.update(b=2)
+
+
+def test_frozen_dict_survives_pickling():
+    frozen = _freeze({'nested': {'a': [1, 2]}})
+    restored = pickle.loads(pickle.dumps(frozen))
+    assert restored == frozen
+    assert isinstance(restored, FrozenDict) and isinstance(restored['nested'], FrozenDict)